@@ -16,15 +16,13 @@ import numpy as np
 ######################
 
 def get_valid_moves(state: TwoPlayerGameState, player_label: Any) -> list:
-  """Returns the list of valid moves for the player judging from the board."""
-  width = state.game.width
-  height = state.game.height
-  board = state.board
-  enemy_label = state.player2.label if player_label == state.player1.label else state.player1.label
-  return [(x, y) for x in range(1, width + 1)
-            for y in range(1, height + 1)
-            if (x, y) not in board.keys() and
-            enemy_captured_by_move(board, (x, y), player_label, enemy_label)]
+  """Returns the list of valid moves for the player judging from the board.
+
+  The list is cached on the state and shared with the game, so it is
+  computed at most once per state and player.
+  """
+  player = state.player1 if player_label == state.player1.label else state.player2
+  return state.get_valid_moves(player)
 
 def enemy_captured_by_move(board: dict, move, player_label: Any, enemy_label: Any) -> list:
   return capture_enemy_in_dir(board, move, player_label, enemy_label, (0, 1)) \
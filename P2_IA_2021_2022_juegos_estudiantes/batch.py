@@ -0,0 +1,177 @@
+"""Move generation and evaluation of many Reversi positions at once.
+
+    Analyses of large sets of positions (e.g. all the leaves of a search
+    tree) spend most of their time in Python loops over single boards.
+    Here the positions are the rows of an (N, height * width) np.int8
+    array, with the cells of ArrayBoard: cell (x - 1) * height + (y - 1)
+    is +1 for a disc of player 1, -1 for a disc of player 2 and 0 if the
+    square is empty. Legal moves, flip counts and features are computed
+    for all the rows together by shifting boolean planes of the boards in
+    each of the 8 directions, as the bitboards do with the bits of one.
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from reversi import ArrayBoard, BitBoard
+
+# Steps (dx, dy) of the 8 directions.
+DIRECTIONS = [
+    (dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)
+]
+
+# Columns of the array returned by features.
+FEATURES = ('discs', 'mobility', 'corners', 'weighted_squares')
+
+
+def positions_array(
+    boards: Any,
+    height: int,
+    width: int,
+    labels: Tuple[Any, Any] = ('B', 'W'),
+) -> np.ndarray:
+    """(N, height * width) np.int8 array of N boards.
+
+    boards is such an array already, or a sequence of ArrayBoard,
+    BitBoard or dictionary boards.
+    """
+    if isinstance(boards, np.ndarray):
+        cells = boards.astype(np.int8, copy=False)
+        if cells.ndim != 2 or cells.shape[1] != height * width:
+            raise ValueError('Expected an array of shape (N, {})'.format(height * width))
+        return cells
+    n_squares = height * width
+    n_bytes = (n_squares + 7) // 8
+    cells = np.zeros((len(boards), n_squares), dtype=np.int8)
+    for row, board in enumerate(boards):
+        if isinstance(board, ArrayBoard):
+            cells[row] = board.cells
+        elif isinstance(board, BitBoard):
+            for bits, sign in ((board.black, 1), (board.white, -1)):
+                plane = np.unpackbits(
+                    np.frombuffer(bits.to_bytes(n_bytes, 'little'), dtype=np.uint8),
+                    bitorder='little',
+                )[:n_squares]
+                cells[row, plane.astype(bool)] = sign
+        else:
+            cells[row] = ArrayBoard.from_dictionary(board, height, width, labels).cells
+    return cells
+
+
+def _shift(planes: np.ndarray, dx: int, dy: int, steps: int) -> np.ndarray:
+    """Planes moved so that [:, x, y] holds [:, x + steps * dx, y + steps * dy].
+
+    Squares beyond the edge of the board are False.
+    """
+    shifted = np.zeros_like(planes)
+    _, width, height = planes.shape
+    sx, sy = steps * dx, steps * dy
+    if abs(sx) >= width or abs(sy) >= height:
+        return shifted
+    shifted[
+        :,
+        max(0, -sx):width - max(0, sx),
+        max(0, -sy):height - max(0, sy),
+    ] = planes[
+        :,
+        max(0, sx):width - max(0, -sx),
+        max(0, sy):height - max(0, -sy),
+    ]
+    return shifted
+
+
+def flip_counts(
+    cells: np.ndarray,
+    signs: Any,
+    height: int,
+    width: int,
+) -> np.ndarray:
+    """Discs flipped by playing on each square, for all the positions.
+
+    signs is +1 (player 1) or -1 (player 2) for the player to move, one
+    for all the positions or one per row. Returns an (N, height * width)
+    array, 0 for the squares that are not legal moves.
+    """
+    cells = positions_array(cells, height, width)
+    signs = np.broadcast_to(np.asarray(signs, dtype=np.int8), (len(cells),))
+    boards = cells.reshape(-1, width, height)
+    own = boards == signs[:, None, None]
+    enemy = boards == -signs[:, None, None]
+    counts = np.zeros(boards.shape, dtype=np.int16)
+    for dx, dy in DIRECTIONS:
+        # run: the first n_enemies squares in the direction are enemy discs.
+        run = _shift(enemy, dx, dy, 1)
+        n_enemies = 1
+        while run.any():
+            bracketed = run & _shift(own, dx, dy, n_enemies + 1)
+            counts += n_enemies * bracketed
+            n_enemies += 1
+            run &= _shift(enemy, dx, dy, n_enemies)
+    counts[boards != 0] = 0
+    return counts.reshape(len(cells), -1)
+
+
+def legal_moves(
+    cells: np.ndarray,
+    signs: Any,
+    height: int,
+    width: int,
+) -> np.ndarray:
+    """(N, height * width) boolean masks of the legal moves (see flip_counts)."""
+    return flip_counts(cells, signs, height, width) > 0
+
+
+def corner_indices(height: int, width: int) -> list:
+    """Indices of the corners in the rows of a positions array."""
+    return sorted({
+        (x - 1) * height + (y - 1) for x in (1, width) for y in (1, height)
+    })
+
+
+def features(
+    cells: np.ndarray,
+    height: int,
+    width: int,
+    weights: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """(N, len(FEATURES)) feature vectors, from the point of view of player 1.
+
+    Each feature is the difference between the players: discs, legal
+    moves, corners and, if weights (with weights[x - 1, y - 1] for square
+    (x, y)) are given, weights of the squares taken (0 otherwise).
+    """
+    cells = positions_array(cells, height, width)
+    result = np.zeros((len(cells), len(FEATURES)), dtype=float)
+    result[:, 0] = cells.sum(axis=1, dtype=float)
+    result[:, 1] = (
+        legal_moves(cells, 1, height, width).sum(axis=1)
+        - legal_moves(cells, -1, height, width).sum(axis=1)
+    )
+    result[:, 2] = cells[:, corner_indices(height, width)].sum(axis=1, dtype=float)
+    if weights is not None:
+        result[:, 3] = cells @ np.asarray(weights, dtype=float).ravel()
+    return result
+
+
+def states_array(states: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions array of Reversi states, and +1/-1 for the player max of each.
+
+    All the states have to be of the same game.
+    """
+    if not states:
+        return np.zeros((0, 0), dtype=np.int8), np.zeros(0, dtype=np.int8)
+    game = states[0].game
+    cells = positions_array(
+        [state.board for state in states],
+        game.height,
+        game.width,
+        (game.player1.label, game.player2.label),
+    )
+    signs = np.array(
+        [1 if state.is_player_max(state.player1) else -1 for state in states],
+        dtype=np.int8,
+    )
+    return cells, signs
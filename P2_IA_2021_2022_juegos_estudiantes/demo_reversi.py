@@ -13,7 +13,7 @@ from game import Player, TwoPlayerGameState, TwoPlayerMatch
 from heuristic import heuristic, heuristic_2, heuristic_3
 from reversi import (Reversi, from_array_to_dictionary_board,
                      from_dictionary_to_array_board)
-from strategy import (ManualStrategy, MinimaxAlphaBetaStrategy,
+from strategy import (ManualStrategy, MCTSStrategy, MinimaxAlphaBetaStrategy,
                       MinimaxStrategy, RandomStrategy)
 
 player_manual = Player(
@@ -73,6 +73,15 @@ player_alphabeta2 = Player(
     )
 )
 
+player_mcts = Player(
+    name='MCTS',
+    strategy=MCTSStrategy(
+        max_iterations=None,
+        max_seconds_per_move=5,
+        verbose=1,
+    ),
+)
+
 
 # Manual vs manual player
 #player_a, player_b = player_manual, player_manual2
@@ -87,6 +96,9 @@ player_a, player_b = player_minimax4, player_minimax3
 # minimax alpha-beta vs minimax alpha-beta player
 # player_a, player_b = player_alphabeta1, player_alphabeta2
 
+# Monte Carlo tree search vs minimax alpha-beta player
+# player_a, player_b = player_mcts, player_alphabeta2
+
 """
 Here you can initialize the player that moves first
 and the board to any valid state.
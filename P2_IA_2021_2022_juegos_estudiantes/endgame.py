@@ -0,0 +1,245 @@
+"""Exact endgame solver for Reversi.
+
+    When few squares are empty, the game tree can be searched to the end:
+    the result of the game is then known exactly instead of estimated by
+    a heuristic. The solver searches bitboards (see BitboardReversi)
+    with negamax alpha-beta, without creating states. Positions of the
+    other Reversi games (dictionary or array boards) are converted.
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from game import Deadline, TwoPlayerGameState
+from reversi import BitboardReversi, Reversi, popcount
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+SOLVER_MODES = ('exact', 'wld')
+
+
+class EndgameSolver(object):
+    """Perfect play for positions with at most max_empties empty squares.
+
+    In mode 'exact' the solver finds the final difference in discs with
+    perfect play; in mode 'wld' only whether the game is won, lost or
+    drawn, which is faster. Search strategies use the solver in place of
+    the heuristic (see SearchStrategy): a position is worth
+    win_value plus the final difference in discs if it is won, and
+    minus win_value plus the difference if it is lost, so that any won
+    position is preferred to any position evaluated by a heuristic.
+
+    Moves are ordered by:
+        - the best move stored in the transposition table of the solver,
+        - parity: moves in regions (quadrants) of the board with an odd
+          number of empty squares first, since the last move in a region
+          tends to be an advantage,
+        - fastest first: moves that leave the opponent fewer replies first
+          (when at least fastest_first_empties squares are empty).
+
+    With a deadline, the clock is checked every time_check_interval
+    nodes and DeadlineExceeded is raised when the time is over, as in
+    the searches of the strategies.
+    """
+
+    # Nodes searched between two checks of the clock.
+    time_check_interval = 256
+
+    def __init__(
+        self,
+        max_empties: int = 10,
+        mode: str = 'exact',
+        win_value: float = 1e6,
+        table_size: int = 2**16,
+        fastest_first_empties: int = 7,
+    ) -> None:
+        if mode not in SOLVER_MODES:
+            raise ValueError(
+                'Unknown mode {}, use one of {}'.format(mode, SOLVER_MODES),
+            )
+        self.max_empties = max_empties
+        self.mode = mode
+        self.win_value = win_value
+        self.fastest_first_empties = fastest_first_empties
+        self.transposition_table = TranspositionTable(table_size)
+        self._game = None
+        # BitboardReversi by board size, to search the other Reversi games.
+        self._bitboard_games: Dict[Tuple[int, int], BitboardReversi] = {}
+        self._regions: List[int] = []
+        self._deadline: Optional[Deadline] = None
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Reset the counters of positions solved, nodes and time."""
+        self.solved = 0
+        self.nodes = 0
+        self.seconds = 0.0
+
+    def stats(self) -> dict:
+        """Counters since the last reset."""
+        return {
+            'solved': self.solved,
+            'nodes': self.nodes,
+            'seconds': self.seconds,
+            'nodes_per_second': self.nodes / self.seconds if self.seconds > 0 else 0.0,
+        }
+
+    def applies(self, state: TwoPlayerGameState) -> bool:
+        """Whether the solver can solve the state (Reversi, few empty squares)."""
+        game = state.game
+        if not isinstance(game, Reversi) or state.end_of_game:
+            return False
+        empties = game.height * game.width - len(state.board)
+        return empties <= self.max_empties
+
+    def value(
+        self,
+        state: TwoPlayerGameState,
+        deadline: Optional[Deadline] = None,
+    ) -> float:
+        """Value of the state with perfect play, for the player max."""
+        game = self._bitboard_game(state.game)
+        board = game._to_bitboard(state.board)
+        own, enemy = game._own_and_enemy(board, state.next_player.label)
+
+        start = time.perf_counter()
+        try:
+            if self.mode == 'exact':
+                difference = self.solve(game, own, enemy, deadline=deadline)
+            else:
+                difference = self.solve(game, own, enemy, -1, 1, deadline)
+        finally:
+            self.seconds += time.perf_counter() - start
+        self.solved += 1
+
+        if not state.is_player_max(state.next_player):
+            difference = -difference
+        if difference > 0:
+            return self.win_value + (difference if self.mode == 'exact' else 0)
+        if difference < 0:
+            return -self.win_value + (difference if self.mode == 'exact' else 0)
+        return 0.0
+
+    def solve(
+        self,
+        game: BitboardReversi,
+        own: int,
+        enemy: int,
+        alpha: float = -float('inf'),
+        beta: float = float('inf'),
+        deadline: Optional[Deadline] = None,
+    ) -> int:
+        """Final difference in discs for the player to move (owning own).
+
+        Exact if it is within (alpha, beta), otherwise a bound (fail soft).
+        Raises DeadlineExceeded if the deadline expires first.
+        """
+        self._use_game(game)
+        self._deadline = deadline
+        try:
+            return self._negamax(own, enemy, alpha, beta, False)
+        finally:
+            self._deadline = None
+
+    def _bitboard_game(self, game: Reversi) -> BitboardReversi:
+        """The game, or a BitboardReversi of the same size for other Reversi games."""
+        if isinstance(game, BitboardReversi):
+            return game
+        size = (game.height, game.width)
+        if size not in self._bitboard_games:
+            self._bitboard_games[size] = BitboardReversi(
+                game.player1, game.player2, game.height, game.width,
+            )
+        return self._bitboard_games[size]
+
+    def _use_game(self, game: BitboardReversi) -> None:
+        """Prepare the region masks for the board of a game."""
+        if game is self._game:
+            return
+        self._game = game
+        self.transposition_table.clear()
+        half_width, half_height = game.width // 2, game.height // 2
+        regions = [0, 0, 0, 0]
+        for x in range(game.width):
+            for y in range(game.height):
+                region = 2 * (x >= half_width) + (y >= half_height)
+                regions[region] |= 1 << (x * game.height + y)
+        self._regions = [region for region in regions if region]
+
+    def _negamax(self, own: int, enemy: int, alpha: float, beta: float, passed: bool) -> int:
+        self.nodes += 1
+        if (
+            self._deadline is not None
+            and self.nodes % self.time_check_interval == 0
+        ):
+            self._deadline.check()
+        game = self._game
+        moves = game._move_mask(own, enemy)
+        if not moves:
+            if passed:
+                # Neither player can move: the game is over.
+                return popcount(own) - popcount(enemy)
+            return -self._negamax(enemy, own, -beta, -alpha, True)
+
+        key = (own, enemy)
+        alpha_original = alpha
+        tt_move = 0
+        entry = self.transposition_table.lookup(key)
+        if entry is not None:
+            if entry.flag == EXACT:
+                return entry.value
+            if entry.flag == LOWER_BOUND:
+                alpha = max(alpha, entry.value)
+            else:
+                beta = min(beta, entry.value)
+            if alpha >= beta:
+                return entry.value
+            tt_move = entry.move
+
+        best_value, best_move = -float('inf'), 0
+        for move_bit, flips in self._ordered_moves(own, enemy, moves, tt_move):
+            value = -self._negamax(
+                enemy & ~flips, own | move_bit | flips, -beta, -alpha, False,
+            )
+            if value > best_value:
+                best_value, best_move = value, move_bit
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best_value <= alpha_original:
+            flag = UPPER_BOUND
+        elif best_value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        empties = game.height * game.width - popcount(own | enemy)
+        self.transposition_table.store(key, empties, best_value, flag, best_move)
+        return best_value
+
+    def _ordered_moves(self, own: int, enemy: int, moves: int, tt_move: int) -> List[Tuple[int, int]]:
+        """Moves (move bit, flipped discs) in the order in which to search them."""
+        game = self._game
+        empty = game._full_mask & ~(own | enemy)
+        fastest_first = popcount(empty) >= self.fastest_first_empties
+        odd_regions = 0
+        for region in self._regions:
+            if popcount(region & empty) % 2 == 1:
+                odd_regions |= region
+
+        keyed_moves: List[Tuple[Any, int, int]] = []
+        while moves:
+            move_bit = moves & -moves
+            moves ^= move_bit
+            flips = game._flip_mask(own, enemy, move_bit)
+            replies = (
+                popcount(game._move_mask(enemy & ~flips, own | move_bit | flips))
+                if fastest_first else 0
+            )
+            sort_key = (move_bit != tt_move, not move_bit & odd_regions, replies)
+            keyed_moves.append((sort_key, move_bit, flips))
+        keyed_moves.sort()
+        return [(move_bit, flips) for _, move_bit, flips in keyed_moves]
+
@@ -9,10 +9,13 @@
 from __future__ import annotations  # For Python 3.7
 
 import copy
+import random
 import time
 from abc import ABC, abstractmethod
 from tkinter import Frame, Tk, messagebox
-from typing import Any, Callable, List, Optional, Sequence, Tuple
+from types import MappingProxyType
+from typing import (Any, Callable, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
 
 import numpy as np
 
@@ -23,9 +26,76 @@ from strategy import (
 )
 """
 
-import _thread
 import threading
-from contextlib import contextmanager
+
+# Fixed seed, so that Zobrist keys are the same in every process.
+ZOBRIST_SEED = 2021
+
+
+def read_only(value: Any) -> Any:
+    """Read-only version of a board or of the scores, without copies.
+
+    Dictionaries are wrapped in a MappingProxyType, whose copy() is an
+    ordinary dictionary.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType(value)
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if hasattr(value, 'read_only_view'):
+        return value.read_only_view()
+    return value
+
+
+class DeadlineExceeded(Exception):
+    """The time available for a move is over."""
+
+
+class Deadline(object):
+    """Point in time by which a move has to be made.
+
+    Strategies check it cooperatively (expired or check), so that time
+    control works in any thread or process and the strategy can decide
+    what to do with the work done so far.
+
+    A deadline with a parent also expires when the parent does, so that
+    the time budget of a search can be cut short (see reset) by whoever
+    holds the deadline of the move.
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[float] = None,
+        parent: Optional[Deadline] = None,
+    ) -> None:
+        self.seconds = seconds
+        self.parent = parent
+        self.end_time = None if seconds is None else time.monotonic() + seconds
+
+    def reset(self, seconds: Optional[float]) -> None:
+        """Change the time left, from now (0 expires the deadline at once)."""
+        self.seconds = seconds
+        self.end_time = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, infinite if there is no limit."""
+        remaining = np.inf if self.end_time is None else self.end_time - time.monotonic()
+        if self.parent is not None:
+            remaining = min(remaining, self.parent.remaining())
+        return remaining
+
+    def expired(self) -> bool:
+        """Determine whether the time is over."""
+        if self.end_time is not None and time.monotonic() >= self.end_time:
+            return True
+        return self.parent is not None and self.parent.expired()
+
+    def check(self) -> None:
+        """Raise DeadlineExceeded if the time is over."""
+        if self.expired():
+            raise DeadlineExceeded()
 
 
 class Player(object):
@@ -46,11 +116,12 @@ class Player(object):
         self,
         state: TwoPlayerGameState,
         gui: bool = False,
+        deadline: Optional[Deadline] = None,
     ) -> TwoPlayerGameState:
         """Player's move."""
         if self.delay > 0:
             time.sleep(self.delay)
-        return self.strategy.next_move(state, gui)
+        return self.strategy.next_move(state, gui, deadline=deadline)
 
 
 class TwoPlayerGameState(object):
@@ -73,6 +144,11 @@ class TwoPlayerGameState(object):
         self.board = board
         self.move_code = move_code
         self.parent = parent
+        self._zobrist_key: Optional[int] = None
+        # pieces of player 1 and player 2, see disc_counts
+        self._disc_counts: Optional[Tuple[int, int]] = None
+        # legal moves per player label, filled lazily by get_valid_moves
+        self._valid_moves: dict = {}
         # variables for GUI:
         self.gui_root = None
         self.gui_frame = None
@@ -139,17 +215,96 @@ class TwoPlayerGameState(object):
         assert isinstance(self.player_max, Player)
         return player.label == self.player_max.label
 
+    @property
+    def zobrist_key(self) -> int:
+        """64-bit Zobrist key of the board and the player to move.
+
+        Successors receive it updated incrementally from the squares that
+        change; it is only computed from scratch for the initial state.
+        """
+        if self._zobrist_key is None:
+            assert isinstance(self.game, TwoPlayerGame)
+            self._zobrist_key = self.game.zobrist_hash(self)
+        return self._zobrist_key
+
+    @property
+    def disc_counts(self) -> Tuple[int, int]:
+        """Number of pieces of player 1 and of player 2 on the board.
+
+        Like the Zobrist key, successors receive the counts updated from
+        the squares that change, so scores do not recount the board.
+        """
+        if self._disc_counts is None:
+            assert isinstance(self.game, TwoPlayerGame)
+            self._disc_counts = self.game.disc_counts(self)
+        return self._disc_counts
+
+    def get_valid_moves(self, player: Optional[Player] = None) -> list:
+        """Legal moves of a player (by default the next one).
+
+        The list is computed by the game the first time it is requested
+        and cached on the state, so the game, the strategies and the
+        heuristics share a single computation per state and player.
+        It must not be modified.
+        """
+        if player is None:
+            player = self.next_player
+        assert isinstance(self.game, TwoPlayerGame)
+        assert isinstance(player, Player)
+        moves = self._valid_moves.get(player.label)
+        if moves is None:
+            moves = self.game.valid_moves(self, player)
+            self._valid_moves[player.label] = moves
+        return moves
+
+    def read_only_view(self) -> TwoPlayerGameState:
+        """Shallow copy of the state whose board and scores are read-only.
+
+        It shares the game and the players with the state, so it is much
+        cheaper than clone. The legal moves already computed are copied,
+        so that modifying the lists of the view does not change the state.
+        """
+        view = copy.copy(self)
+        view.board = read_only(self.board)
+        view.scores = read_only(self.scores)
+        view._valid_moves = {
+            label: list(moves) for label, moves in self._valid_moves.items()
+        }
+        return view
+
+    def _shared_strategies(self) -> dict:
+        """Memo for copy.deepcopy that keeps the strategies of the players.
+
+        Strategies hold searches (tables, trees, books, threads, pools of
+        workers), not game state, so the copies of a state share them.
+        """
+        players = [self.player_max, self.next_player]
+        if self.game is not None:
+            players += [self.game.player1, self.game.player2]
+        return {
+            id(player.strategy): player.strategy
+            for player in players
+            if isinstance(player, Player)
+        }
+
     def clone(self) -> TwoPlayerGameState:
         c = TwoPlayerGameState()
-        c.game = copy.deepcopy(self.game)
-        c.player_max = copy.deepcopy(self.player_max)
-        c.next_player = copy.deepcopy(self.next_player)
-        c.board = copy.deepcopy(self.board)
+        c.game = copy.deepcopy(self.game, self._shared_strategies())
+        c.player_max = copy.deepcopy(self.player_max, self._shared_strategies())
+        c.next_player = copy.deepcopy(self.next_player, self._shared_strategies())
+        if isinstance(self.board, MappingProxyType):
+            # Board of a read-only view.
+            c.board = copy.deepcopy(self.board.copy())
+        else:
+            c.board = copy.deepcopy(self.board)
         c.move_code = copy.deepcopy(self.move_code)
         c.parent = self.parent
 
         c.end_of_game = self.end_of_game
         c.scores = self.scores
+        c._zobrist_key = self._zobrist_key
+        c._disc_counts = self._disc_counts
+        c._valid_moves = copy.deepcopy(self._valid_moves)
 
         c.gui_root = self.gui_root
         c.gui_frame = self.gui_frame
@@ -162,8 +317,15 @@ class TwoPlayerGameState(object):
         self,
         board_successor: Any = None,
         move_code: Any = None,
+        zobrist_key: Optional[int] = None,
+        disc_counts: Optional[Tuple[int, int]] = None,
     ) -> TwoPlayerGameState:
-        """Generate one successor."""
+        """Generate one successor.
+
+        zobrist_key and disc_counts are the key and the piece counts of
+        the successor, if the game has updated them incrementally.
+        Otherwise they are computed when first needed.
+        """
         successor = TwoPlayerGameState(
             game=self.game,
             player_max = self.player_max,
@@ -179,6 +341,8 @@ class TwoPlayerGameState(object):
         successor.board = board_successor
         successor.move_code = move_code
         successor.parent = self
+        successor._zobrist_key = zobrist_key
+        successor._disc_counts = disc_counts
 
         end_of_game, scores = self.game.score(successor)
         successor.end_of_game = end_of_game
@@ -191,10 +355,14 @@ class TwoPlayerGameState(object):
 
         return successor
 
-    def move(self, gui: bool = False) -> TwoPlayerGameState:
+    def move(
+        self,
+        gui: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TwoPlayerGameState:
         """Make move."""
         assert isinstance(self.next_player, Player)
-        next_state = self.next_player.move(self, gui)
+        next_state = self.next_player.move(self, gui, deadline)
         if gui:
             self.gui_root = self.gui_thread.gui_root
             self.gui_buttons = self.gui_thread.gui_buttons
@@ -227,6 +395,46 @@ class TwoPlayerGame(ABC):
         self.player2.label = -1
         self.max_score: float = np.inf
         self.min_score: float = -np.inf
+        self._zobrist_side: int = 0
+        self._zobrist_squares: dict = {}
+
+    def _init_zobrist(self, squares: Iterable[Any], labels: Iterable[Any]) -> None:
+        """Draw the random Zobrist keys for every square and label."""
+        rng = random.Random(ZOBRIST_SEED)
+        self._zobrist_side = rng.getrandbits(64)
+        self._zobrist_squares = {
+            (square, label): rng.getrandbits(64)
+            for square in squares for label in labels
+        }
+
+    def zobrist_square(self, square: Any, label: Any) -> int:
+        """Zobrist key of a square holding a piece of a player."""
+        return self._zobrist_squares[(square, label)]
+
+    def zobrist_side(self) -> int:
+        """Key toggled whenever the player to move changes."""
+        return self._zobrist_side
+
+    def zobrist_hash(self, state: TwoPlayerGameState) -> int:
+        """Zobrist key of a game state, computed from scratch."""
+        assert isinstance(state.next_player, Player)
+        key = self._zobrist_side if state.next_player.label == self.player2.label else 0
+        for square, label in self.occupied_squares(state.board):
+            key ^= self._zobrist_squares[(square, label)]
+        return key
+
+    def disc_counts(self, state: TwoPlayerGameState) -> Tuple[int, int]:
+        """Pieces of player 1 and of player 2, counted from scratch."""
+        counts = {self.player1.label: 0, self.player2.label: 0}
+        for _, label in self.occupied_squares(state.board):
+            counts[label] += 1
+        return counts[self.player1.label], counts[self.player2.label]
+
+    def occupied_squares(self, board: Any) -> Iterable[Tuple[Any, Any]]:
+        """Pairs (square, label) of the pieces on the board."""
+        raise NotImplementedError(
+            'Zobrist keys are not defined for {}'.format(self.name),
+        )
 
     def opponent(self, player: Player) -> Player:
         """Return the opponent in the match."""
@@ -321,6 +529,112 @@ class TwoPlayerGame(ABC):
     def gui_update(self, state: TwoPlayerGameState, gui_buttons: dict, gui_root: Tk, moves: list = [], click_function: Callable[[Any], None] = None) -> None:
         pass
 
+    def valid_moves(self, state: TwoPlayerGameState, player: Player) -> list:
+        """Legal moves of a player in a game state.
+
+        Use TwoPlayerGameState.get_valid_moves, which caches the result.
+        """
+        raise NotImplementedError(
+            'Legal moves are not defined for {}'.format(self.name),
+        )
+
+    def moves(self, state: TwoPlayerGameState) -> list:
+        """Moves that can be played with make_move in a game state."""
+        raise NotImplementedError(
+            'Moves in place are not defined for {}'.format(self.name),
+        )
+
+    def move_code(self, state: TwoPlayerGameState, move: Any) -> Any:
+        """Move code of the successor obtained by playing a move."""
+        raise NotImplementedError(
+            'Moves in place are not defined for {}'.format(self.name),
+        )
+
+    def static_move_score(self, move_code: Any) -> float:
+        """A priori quality of a move, used to order moves in a search."""
+        return 0.0
+
+    def tactical_moves(self, state: TwoPlayerGameState) -> list:
+        """Moves (as in moves) that make the position volatile.
+
+        Quiescence search keeps searching them beyond the depth cut-off.
+        None by default.
+        """
+        return []
+
+    def random_playout(self, state: TwoPlayerGameState, rng: random.Random) -> Any:
+        """Play random moves from the state to the end of the game.
+
+        Returns the final scores. The state is left as it was: the moves
+        are played in place and taken back. Games can redefine this with
+        a faster path that does not go through make_move.
+        """
+        undo_stack = []
+        try:
+            while not state.end_of_game:
+                moves = self.moves(state)
+                undo_stack.append(
+                    self.make_move(state, moves[rng.randrange(len(moves))]),
+                )
+            return state.scores
+        finally:
+            while undo_stack:
+                self.unmake_move(state, undo_stack.pop())
+
+    def make_move(self, state: TwoPlayerGameState, move: Any) -> Any:
+        """Play a move on the state itself, without creating a successor.
+
+        The state becomes the successor for the move (except for its
+        parent, which is not updated). Returns the information that
+        unmake_move needs to take the move back.
+        """
+        assert isinstance(state.next_player, Player)
+        undo_info = (
+            state.next_player,
+            state.move_code,
+            state.end_of_game,
+            state.scores,
+            state.zobrist_key,
+            state._disc_counts,
+            state._valid_moves,
+            self._play_in_place(state, move),
+        )
+        state.next_player = self.opponent(state.next_player)
+        state._valid_moves = {}
+        state.end_of_game, state.scores = self.score(state)
+        return undo_info
+
+    def unmake_move(self, state: TwoPlayerGameState, undo_info: Any) -> None:
+        """Take back the move played by make_move."""
+        (
+            state.next_player,
+            state.move_code,
+            state.end_of_game,
+            state.scores,
+            state._zobrist_key,
+            state._disc_counts,
+            state._valid_moves,
+            board_undo_info,
+        ) = undo_info
+        self._undo_in_place(state, board_undo_info)
+
+    def _play_in_place(self, state: TwoPlayerGameState, move: Any) -> Any:
+        """Update board, move code, Zobrist key and disc counts for a move.
+
+        Called before the next player changes. Games that do not update
+        the disc counts incrementally set them to None. Returns the
+        information needed to restore the board.
+        """
+        raise NotImplementedError(
+            'Moves in place are not defined for {}'.format(self.name),
+        )
+
+    def _undo_in_place(self, state: TwoPlayerGameState, board_undo_info: Any) -> None:
+        """Restore the board changed by _play_in_place."""
+        raise NotImplementedError(
+            'Moves in place are not defined for {}'.format(self.name),
+        )
+
     @abstractmethod
     def generate_successors(
         self,
@@ -330,6 +644,29 @@ class TwoPlayerGame(ABC):
         pass
     #   NOTE return list of successors
 
+    def successor(
+        self,
+        state: TwoPlayerGameState,
+        move: Any,
+    ) -> TwoPlayerGameState:
+        """Successor of a game state for a move (as in moves)."""
+        raise NotImplementedError(
+            'Lazy successors are not defined for {}'.format(self.name),
+        )
+
+    def iter_successors(
+        self,
+        state: TwoPlayerGameState,
+    ) -> Iterator[TwoPlayerGameState]:
+        """Successors of a game state, in the order of generate_successors.
+
+        A generator: each successor is created when it is requested, so
+        a search that stops after the first ones does not pay for the
+        rest.
+        """
+        for move in self.moves(state):
+            yield self.successor(state, move)
+
     @abstractmethod
     def score(
         self,
@@ -366,23 +703,21 @@ class TwoPlayerMatch(object):
         self.max_seconds_per_move = max_seconds_per_move
         self.gui = gui
 
-    @contextmanager
-    def time_limit(self, seconds: float):
-        timer = threading.Timer(seconds, lambda: _thread.interrupt_main())
-        timer.start()
-        try:
-            yield
-        except KeyboardInterrupt:
-            pass
-        finally:
-            # if the action ends in specified time, timer is canceled
-            timer.cancel()
-
     def play_match(self) -> Optional[np.ndarray]:
         """Play a match."""
         if (self.initial_state is None):
             raise ValueError('Please, provide an initial state')
 
+        try:
+            return self._play_match()
+        finally:
+            # Stop work in the background (e.g. pondering) when the match
+            # is over, however it ends.
+            game = self.initial_state.game
+            for player in (game.player1, game.player2):
+                player.strategy.stop()
+
+    def _play_match(self) -> Optional[np.ndarray]:
         state = self.initial_state.setup_match(self.gui)
         if (self._verbose > 0):
             print('\nLet\'s play %s!\n' % (self.initial_state.game.name))
@@ -428,12 +763,13 @@ class TwoPlayerMatch(object):
                 print()
 
             # limit maximum seconds for this move
-            finished = False
-            with self.time_limit(self.max_seconds_per_move):
-                state = state.move(self.gui)
-                finished = True
+            deadline = Deadline(self.max_seconds_per_move)
+            try:
+                next_state = state.move(self.gui, deadline)
+            except DeadlineExceeded:
+                next_state = None
 
-            if not finished:
+            if next_state is None or deadline.expired():
                 print("Match cancelled because player %s used too much time" % (state.next_player.label))
                 scores = np.zeros(2, dtype=float)
                 if state.next_player == state.player1:
@@ -442,6 +778,7 @@ class TwoPlayerMatch(object):
                     scores[1] = -1
                 return scores
 
+            state = next_state
             n_moves += 1
 
         if self._verbose > 0:
@@ -10,13 +10,14 @@
 
 from __future__ import annotations  # For Python 3.7
 
-from typing import Callable, Sequence
+from typing import Callable, List, Optional, Sequence
 
 import numpy as np
 
+from batch import states_array
 from game import TwoPlayerGameState
 
-from reversi import from_dictionary_to_array_board
+from reversi import ArrayBoard, from_dictionary_to_array_board
 
 
 class Heuristic(object):
@@ -26,24 +27,78 @@ class Heuristic(object):
         self,
         name: str,
         evaluation_function: Callable[[TwoPlayerGameState], float],
+        check_mutations: bool = False,
+        batch_evaluation_function: Optional[
+            Callable[[List[TwoPlayerGameState]], np.ndarray]
+        ] = None,
     ) -> None:
-        """Initialize name of heuristic & evaluation function."""
+        """Initialize name of heuristic & evaluation function.
+
+        check_mutations verifies after every evaluation that the state,
+        the game and the players are unchanged (slow, for development).
+        batch_evaluation_function, if given, evaluates a list of states
+        at once (e.g. vectorized with NumPy, see batch.py), with the same
+        values as evaluation_function.
+        """
         self.name = name
         self.evaluation_function = evaluation_function
+        self.check_mutations = check_mutations
+        self.batch_evaluation_function = batch_evaluation_function
 
     def evaluate(self, state: TwoPlayerGameState) -> float:
         """Evaluate a state."""
-        # Prevent modifications of the state.
-        # Deep copy everything, except attributes related
-        # to graphical display.
-        state_copy = state.clone()
-        return self.evaluation_function(state_copy)
+        # Prevent modifications of the state without copying it:
+        # the board and the scores of the view are read-only.
+        state_view = state.read_only_view()
+        if not self.check_mutations:
+            return self.evaluation_function(state_view)
+
+        snapshot = _state_snapshot(state)
+        # The evaluation may add legal moves to the cache, not change them.
+        cached_moves = {
+            label: list(moves) for label, moves in state._valid_moves.items()
+        }
+        value = self.evaluation_function(state_view)
+        if _state_snapshot(state) != snapshot or any(
+            state._valid_moves.get(label) != moves
+            for label, moves in cached_moves.items()
+        ):
+            raise RuntimeError(
+                'Heuristic {} modified the state it evaluated'.format(self.name),
+            )
+        return value
+
+    def evaluate_batch(self, states: List[TwoPlayerGameState]) -> np.ndarray:
+        """Evaluate a list of states, in one call if the heuristic is batched."""
+        if self.batch_evaluation_function is None or self.check_mutations:
+            return np.array([self.evaluate(state) for state in states], dtype=float)
+        return np.asarray(
+            self.batch_evaluation_function([state.read_only_view() for state in states]),
+            dtype=float,
+        )
 
     def get_name(self) -> str:
         """Name getter."""
         return self.name
 
 
+def _state_snapshot(state: TwoPlayerGameState) -> tuple:
+    """Summary of everything an evaluation function must not modify."""
+    try:
+        board_key = state.game.zobrist_hash(state)
+    except NotImplementedError:
+        board_key = repr(state.board)
+    return (
+        board_key,
+        state.next_player,
+        state.player_max,
+        state.player1.label,
+        state.player2.label,
+        state.end_of_game,
+        None if state.scores is None else tuple(state.scores),
+    )
+
+
 def simple_evaluation_function(state: TwoPlayerGameState) -> float:
     """Return a random value, except for terminal game states."""
     state_value = 2*np.random.rand() - 1
@@ -81,6 +136,83 @@ def count_pieces(state: TwoPlayerGameState) -> float:
         raise ValueError('Player MAX not defined')
 
 
+# Weight of each square of an 8x8 board: STATIC_WEIGHTS[x - 1, y - 1].
+STATIC_WEIGHTS = np.array([
+    [4, -3, 2, 2, 2, 2, -3, 4],
+    [-3, -4, -1, -1, -1, -1, -4, -3],
+    [2, -1, 1, 0, 0, 1, -1, 2],
+    [2, -1, 0, 1, 1, 0, -1, 2],
+    [2, -1, 0, 1, 1, 0, -1, 2],
+    [2, -1, 1, 0, 0, 1, -1, 2],
+    [-3, -4, -1, -1, -1, -1, -4, -3],
+    [4, -3, 2, 2, 2, 2, -3, 4],
+], dtype=float)
+
+
+def _check_static_weights_size(state: TwoPlayerGameState) -> None:
+    """Raise ValueError if STATIC_WEIGHTS does not fit the board of the state."""
+    width, height = STATIC_WEIGHTS.shape
+    if (state.game.width, state.game.height) != (width, height):
+        raise ValueError(
+            'The static weights are defined for {}x{} boards, not {}x{}'.format(
+                height, width, state.game.height, state.game.width,
+            ),
+        )
+
+
+def array_board(state: TwoPlayerGameState) -> ArrayBoard:
+    """Board of the state as an ArrayBoard (+1 for player 1, -1 for player 2).
+
+    Boards of ArrayReversi are returned as they are; dictionary boards
+    and bitboards are converted, so that vectorized evaluations run with
+    every Reversi implementation.
+    """
+    if isinstance(state.board, ArrayBoard):
+        return state.board
+    return ArrayBoard.from_dictionary(
+        state.board,
+        state.game.height,
+        state.game.width,
+        (state.player1.label, state.player2.label),
+    )
+
+
+def static_weights(state: TwoPlayerGameState) -> float:
+    """Normalized difference of the square weights of the discs of MAX and MIN.
+
+    Vectorized version of the sums over the board of
+    Solution1.staticWeights_heuristic: two dot products of the cells.
+    Only for 8x8 boards.
+    """
+    _check_static_weights_size(state)
+    board = array_board(state)
+    difference = board.weighted_sum(STATIC_WEIGHTS)
+    total = float(np.dot(np.abs(board.cells), STATIC_WEIGHTS.ravel()))
+    if total == 0:
+        return 0.0
+    if state.is_player_max(state.player1):
+        return difference / total
+    elif state.is_player_max(state.player2):
+        return -difference / total
+    else:
+        raise ValueError('Player MAX not defined')
+
+
+def static_weights_batch(states: List[TwoPlayerGameState]) -> np.ndarray:
+    """static_weights of a list of states of the same game, vectorized."""
+    if not states:
+        return np.zeros(0)
+    _check_static_weights_size(states[0])
+    cells, signs = states_array(states)
+    weights = STATIC_WEIGHTS.ravel()
+    difference = cells @ weights
+    total = np.abs(cells) @ weights
+    values = np.zeros(len(cells))
+    nonzero = total != 0
+    values[nonzero] = signs[nonzero] * difference[nonzero] / total[nonzero]
+    return values
+
+
 def count_both_pieces_possible_catches(state: TwoPlayerGameState) -> float:
     """
     this functions takes into account number of player's pieces and number of pieces of enemy which can be captured in next move
@@ -210,4 +342,9 @@ def count_how_many_enemies_could_you_catch(state: TwoPlayerGameState,enemy_posit
 
 heuristic = Heuristic(name='Simple heuristic', evaluation_function=simple_evaluation_function)
 heuristic_2 = Heuristic(name="still_simple_heuristic", evaluation_function=count_pieces)
-heuristic_3 = Heuristic(name="added_possible_catches", evaluation_function=count_both_pieces_possible_catches)
\ No newline at end of file
+heuristic_3 = Heuristic(name="added_possible_catches", evaluation_function=count_both_pieces_possible_catches)
+heuristic_static_weights = Heuristic(
+    name="static_weights",
+    evaluation_function=static_weights,
+    batch_evaluation_function=static_weights_batch,
+)
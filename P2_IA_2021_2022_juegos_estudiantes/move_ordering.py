@@ -0,0 +1,135 @@
+"""Move ordering for alpha-beta search.
+
+    Alpha-beta prunes the most when the best move of every node is
+    searched first. The orderings in this module guess it from the
+    transposition table, from the moves that caused cut-offs elsewhere in
+    the tree (killer moves and history heuristic) and from static
+    knowledge of the game.
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+from typing import Any, List, Tuple
+
+from game import TwoPlayerGameState
+
+
+class MoveOrdering(object):
+    """Order in which the successors of a state are searched.
+
+    The moves are tried in this order:
+        1. the best move stored in the transposition table, or found by
+           the previous iteration of iterative deepening (tt_move),
+        2. the killer moves of the ply: the last moves that caused a
+           cut-off at the same distance from the root (killers),
+        3. the rest, by decreasing history score: the sum of depth**2
+           over the cut-offs caused by the move (history),
+        4. ties are broken by static_score, the a priori quality of the
+           move given by the game (static), e.g. corners first in Reversi,
+           and then by the order of generation.
+
+    The root (ply 0) is ordered by tt_move and static_score only: its
+    history scores would come from earlier searches, and would make the
+    order depend on how they were run (e.g. in parallel).
+
+    Subclasses can redefine static_score to plug in other static orderings.
+    """
+
+    def __init__(
+        self,
+        tt_move: bool = True,
+        killers: int = 2,
+        history: bool = True,
+        static: bool = False,
+    ) -> None:
+        self.tt_move = tt_move
+        self.killers = killers
+        self.history = history
+        self.static = static
+        self._killer_moves: List[List[Any]] = []
+        self._history_scores: dict = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Reset the cut-off counters."""
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self) -> None:
+        """Prepare for the search of a new move.
+
+        Killer moves are forgotten and history scores halved, so that
+        recent cut-offs weigh more.
+        """
+        self._killer_moves = []
+        for key in self._history_scores:
+            self._history_scores[key] //= 2
+
+    def static_score(self, state: TwoPlayerGameState, move_code: Any) -> float:
+        """A priori quality of a move."""
+        return state.game.static_move_score(move_code)
+
+    def order(
+        self,
+        state: TwoPlayerGameState,
+        children: list,
+        move_codes: list,
+        ply: int,
+        tt_move: Any = None,
+    ) -> Tuple[list, list]:
+        """Reorder the children of a state (successors or moves).
+
+        Returns the children and their move codes in the new order.
+        """
+        killer_moves = (
+            self._killer_moves[ply]
+            if self.killers and ply < len(self._killer_moves) else []
+        )
+        label = state.next_player.label
+        use_history = self.history and ply > 0
+
+        def sort_key(index: int) -> tuple:
+            move_code = move_codes[index]
+            return (
+                self.tt_move and tt_move is not None and move_code == tt_move,
+                -killer_moves.index(move_code) if move_code in killer_moves else -self.killers,
+                self._history_scores.get((label, move_code), 0) if use_history else 0,
+                self.static_score(state, move_code) if self.static else 0,
+            )
+
+        # sorted is stable (also in reverse): ties keep the order of generation
+        indices = sorted(range(len(children)), key=sort_key, reverse=True)
+        return [children[index] for index in indices], [move_codes[index] for index in indices]
+
+    def record_cutoff(
+        self,
+        state: TwoPlayerGameState,
+        move_code: Any,
+        ply: int,
+        depth: int,
+        move_number: int,
+    ) -> None:
+        """Learn from the move that caused a cut-off."""
+        self.cutoffs += 1
+        if move_number == 0:
+            self.first_move_cutoffs += 1
+        if self.killers:
+            while len(self._killer_moves) <= ply:
+                self._killer_moves.append([])
+            killer_moves = self._killer_moves[ply]
+            if move_code in killer_moves:
+                killer_moves.remove(move_code)
+            killer_moves.insert(0, move_code)
+            del killer_moves[self.killers:]
+        if self.history:
+            key = (state.next_player.label, move_code)
+            self._history_scores[key] = self._history_scores.get(key, 0) + depth * depth
+
+    def stats(self) -> dict:
+        """Cut-off counters: the closer to 1 the first move rate, the better."""
+        return {
+            'cutoffs': self.cutoffs,
+            'first_move_cutoff_rate': (
+                self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+            ),
+        }
@@ -0,0 +1,261 @@
+"""Opening book: moves for the first plies, computed before the match.
+
+    The first positions of a game are the same in every match, and
+    searching them again each time is wasted effort. An opening book maps
+    the Zobrist key of each of those positions to the move chosen by a
+    deep search, computed once by self-play (build_opening_book) and
+    stored in a binary file.
+
+    The file is a header followed by a hash table with linear probing:
+
+        header: magic (4 bytes), version, max_plies (uint16),
+                number of entries, number of slots (uint32),
+                key of the initial position (uint64)
+        slot:   key (uint64), move (uint16), depth (uint16), value (float32)
+
+    The move is the index of the move in TwoPlayerGame.moves, and
+    NO_MOVE marks an empty slot. The file is memory-mapped when opened,
+    so only the slots probed by lookups are read.
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+import mmap
+import random
+import struct
+from typing import Dict, NamedTuple, Optional
+
+from game import TwoPlayerGame, TwoPlayerGameState
+
+MAGIC = b'OBK1'
+VERSION = 1
+NO_MOVE = 0xFFFF
+
+_HEADER = struct.Struct('<4sHHIIQ')
+_SLOT = struct.Struct('<QHHf')
+
+
+class BookEntry(NamedTuple):
+    """Move of a position in the book."""
+    move_index: int
+    depth: int
+    value: float
+
+
+def initial_pieces(game: TwoPlayerGame) -> int:
+    """Pieces on the board of the initial position of a game."""
+    return len(list(game.occupied_squares(game.initialize_board())))
+
+
+def plies_played(
+    state: TwoPlayerGameState,
+    initial_pieces_count: Optional[int] = None,
+) -> int:
+    """Pieces placed since the initial position (one per move, e.g. Reversi).
+
+    initial_pieces_count is initial_pieces(state.game), computed if not
+    given.
+    """
+    game = state.game
+    if initial_pieces_count is None:
+        initial_pieces_count = initial_pieces(game)
+    return len(list(game.occupied_squares(state.board))) - initial_pieces_count
+
+
+def write_opening_book(
+    path: str,
+    entries: Dict[int, BookEntry],
+    max_plies: int,
+    initial_key: int = 0,
+) -> None:
+    """Write a book file with the entries given by Zobrist key."""
+    n_slots = 1
+    while n_slots < 2 * len(entries):
+        n_slots *= 2
+    slots = [None] * n_slots
+    for key, entry in entries.items():
+        index = key & (n_slots - 1)
+        while slots[index] is not None:
+            index = (index + 1) & (n_slots - 1)
+        slots[index] = (key, entry)
+
+    with open(path, 'wb') as book_file:
+        book_file.write(_HEADER.pack(
+            MAGIC, VERSION, max_plies, len(entries), n_slots, initial_key,
+        ))
+        for slot in slots:
+            if slot is None:
+                book_file.write(_SLOT.pack(0, NO_MOVE, 0, 0.0))
+            else:
+                key, entry = slot
+                book_file.write(_SLOT.pack(key, entry.move_index, entry.depth, entry.value))
+
+
+class OpeningBook(object):
+    """Opening book read from a file written by write_opening_book."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, 'rb') as book_file:
+            self._mmap = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise ValueError('{} is not an opening book'.format(path))
+        magic, version, max_plies, n_entries, n_slots, initial_key = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('{} is not an opening book (version {})'.format(path, VERSION))
+        if len(self._mmap) != _HEADER.size + n_slots * _SLOT.size:
+            self.close()
+            raise ValueError('The opening book {} is truncated'.format(path))
+        self.max_plies = max_plies
+        self.initial_key = initial_key
+        self._n_entries = n_entries
+        self._n_slots = n_slots
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Reset hit and miss counters."""
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: int) -> Optional[BookEntry]:
+        """Entry stored for a Zobrist key, None if the position is not in the book."""
+        mask = self._n_slots - 1
+        index = key & mask
+        while True:
+            slot_key, move_index, depth, value = _SLOT.unpack_from(
+                self._mmap, _HEADER.size + index * _SLOT.size,
+            )
+            if move_index == NO_MOVE:
+                self.misses += 1
+                return None
+            if slot_key == key:
+                self.hits += 1
+                return BookEntry(move_index, depth, value)
+            index = (index + 1) & mask
+
+    def move(self, state: TwoPlayerGameState) -> Optional[TwoPlayerGameState]:
+        """Successor given by the book, None if the state is not in the book."""
+        entry = self.lookup(state.zobrist_key)
+        if entry is None:
+            return None
+        game = state.game
+        moves = game.moves(state)
+        if entry.move_index >= len(moves):
+            return None
+        move_code = game.move_code(state, moves[entry.move_index])
+        for successor in game.generate_successors(state):
+            if successor.move_code == move_code:
+                return successor
+        return None
+
+    def stats(self) -> dict:
+        """Lookup counters."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._mmap.close()
+
+    def __enter__(self) -> OpeningBook:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._n_entries
+
+
+def build_opening_book(
+    initial_state: TwoPlayerGameState,
+    strategy,
+    path: str,
+    max_plies: int = 10,
+    n_games: int = 20,
+    deviation: float = 0.25,
+    seed: Optional[int] = None,
+    verbose: int = 0,
+) -> Dict[int, BookEntry]:
+    """Build a book by self-play and write it to path.
+
+    The strategy plays both sides of n_games games for max_plies plies.
+    Every position reached with more than one legal move is searched
+    once, and its best move stored. The games follow the book moves,
+    except that with probability deviation a random move is played, so
+    that the book also covers the replies to other openings.
+    """
+    rng = random.Random(seed)
+    initial_state = initial_state.setup_match()
+    entries: Dict[int, BookEntry] = {}
+    for game_number in range(n_games):
+        state = initial_state
+        for ply in range(max_plies):
+            if state.end_of_game:
+                break
+            game = state.game
+            successors = game.generate_successors(state)
+            if len(successors) > 1 and state.zobrist_key not in entries:
+                search_state = state.clone()
+                search_state.player_max = search_state.next_player
+                best = strategy.next_move(search_state)
+                move_codes = [game.move_code(state, move) for move in game.moves(state)]
+                value = getattr(best, 'minimax_value', None)
+                entries[state.zobrist_key] = BookEntry(
+                    move_codes.index(best.move_code),
+                    getattr(strategy, 'depth_reached', 0),
+                    float('nan') if value is None else float(value),
+                )
+                if verbose > 0:
+                    print('Game {}, ply {}: {} ({} positions)'.format(
+                        game_number, ply, best.move_code, len(entries),
+                    ))
+            if len(successors) == 1:
+                state = successors[0]
+            elif rng.random() < deviation:
+                state = rng.choice(successors)
+            else:
+                move_code = game.move_code(
+                    state, game.moves(state)[entries[state.zobrist_key].move_index],
+                )
+                state = next(
+                    successor for successor in successors
+                    if successor.move_code == move_code
+                )
+    write_opening_book(path, entries, max_plies, initial_state.zobrist_key)
+    return entries
+
+
+if __name__ == '__main__':
+    import sys
+
+    from game import Player
+    from heuristic import heuristic_2
+    from reversi import BitboardReversi
+    from strategy import MinimaxAlphaBetaStrategy, RandomStrategy
+    from transposition import TranspositionTable
+
+    book_path = sys.argv[1] if len(sys.argv) > 1 else 'reversi_book.bin'
+    player1 = Player(name='Player 1', strategy=RandomStrategy())
+    player2 = Player(name='Player 2', strategy=RandomStrategy())
+    game = BitboardReversi(player1, player2, 8, 8)
+    entries = build_opening_book(
+        TwoPlayerGameState(game=game, initial_player=player1),
+        MinimaxAlphaBetaStrategy(
+            heuristic=heuristic_2,
+            max_depth_minimax=64,
+            transposition_table=TranspositionTable(),
+            max_seconds_per_move=2,
+            in_place=True,
+        ),
+        book_path,
+        seed=0,
+        verbose=1,
+    )
+    print('{} positions written to {}'.format(len(entries), book_path))
@@ -0,0 +1,80 @@
+"""Worker processes for parallel searches.
+
+    Workers are forked, so they inherit the object shared by the search
+    (e.g. the strategy and a copy of the state) and only receive small
+    arguments such as seeds or moves: states and players are never
+    pickled. This is the approach of the parallel tournaments in
+    tournament.py.
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+import numpy as np
+
+from game import Deadline
+
+# Object shared with the workers of the pool being used.
+_shared: Any = None
+
+
+def shared() -> Any:
+    """Object shared with the workers, to be called in a worker."""
+    return _shared
+
+
+def fork_available() -> bool:
+    """Whether worker processes can be forked on this platform."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+class SharedDeadline(Deadline):
+    """Deadline whose end time is in shared memory.
+
+    Processes forked after its creation see the changes made by reset in
+    any of the processes (time.monotonic is the same for all of them).
+    """
+
+    def __init__(self, seconds: Optional[float] = None) -> None:
+        self._end_time = multiprocessing.get_context("fork").RawValue("d", np.inf)
+        super().__init__(seconds)
+
+    @property
+    def end_time(self) -> Optional[float]:
+        end_time = self._end_time.value
+        return None if end_time == np.inf else end_time
+
+    @end_time.setter
+    def end_time(self, end_time: Optional[float]) -> None:
+        self._end_time.value = np.inf if end_time is None else end_time
+
+
+@contextmanager
+def forked_pool(workers: int, shared_object: Any) -> Iterator[Optional[ProcessPoolExecutor]]:
+    """Pool of worker processes that share an object.
+
+    Yields None when there are no workers to start (workers < 1) or
+    processes cannot be forked: the caller has to do the work itself.
+    The object has to be ready before the first task is submitted, when
+    the workers are forked, and must not change while the pool is open.
+    """
+    global _shared
+    if workers < 1:
+        yield None
+        return
+    if not fork_available():
+        print("Parallel searches need the 'fork' start method, searching serially", file=sys.stderr)
+        yield None
+        return
+    _shared = shared_object
+    try:
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            yield executor
+    finally:
+        _shared = None
@@ -0,0 +1,98 @@
+"""Forward pruning for alpha-beta: ProbCut.
+
+    The value of a deep search is well predicted by the value of a
+    shallow search of the same position. ProbCut (Buro, 1995) uses this
+    to prune: if the shallow search predicts that the deep one would fail
+    high (or low) with high probability, the deep search is skipped. The
+    prediction is a linear model fitted to values found by the search
+    itself (see MinimaxAlphaBetaStrategy.calibrate_probcut).
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class ProbCut(object):
+    """Prediction of the value of a search to depth from one to shallow_depth.
+
+    The deep value v is modelled as slope * v' + intercept, v' being the
+    shallow value, with errors of standard deviation sigma. A node at
+    depth is cut off when the prediction is above beta (below alpha) by
+    more than threshold standard deviations. There is one model for
+    nodes of the player max and one for nodes of the player min, since
+    the values of searches of odd and even depth are biased in opposite
+    directions.
+    """
+
+    def __init__(
+        self,
+        depth: int = 4,
+        shallow_depth: int = 2,
+        threshold: float = 1.5,
+    ) -> None:
+        if not 0 < shallow_depth < depth:
+            raise ValueError('The shallow depth has to be between 0 and the depth')
+        if threshold <= 0:
+            raise ValueError('The threshold has to be positive')
+        self.depth = depth
+        self.shallow_depth = shallow_depth
+        self.threshold = threshold
+        # (slope, intercept, sigma) for max nodes (True) and min nodes (False).
+        self.models: Dict[bool, Tuple[float, float, float]] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Reset the counters of shallow searches and cut-offs."""
+        self.tries = 0
+        self.cuts = 0
+
+    def fit(self, samples: List[Tuple[bool, float, float]]) -> None:
+        """Fit the models to samples (is max node, shallow value, deep value).
+
+        Samples with infinite values (e.g. won games) are ignored. A model
+        is only kept if the deep value grows with the shallow one.
+        """
+        self.models = {}
+        for is_max in (True, False):
+            pairs = np.array([
+                (shallow, deep) for sample_is_max, shallow, deep in samples
+                if sample_is_max == is_max and np.isfinite(shallow) and np.isfinite(deep)
+            ])
+            if len(pairs) < 3 or np.ptp(pairs[:, 0]) == 0:
+                continue
+            slope, intercept = np.polyfit(pairs[:, 0], pairs[:, 1], 1)
+            if slope <= 0:
+                continue
+            residuals = pairs[:, 1] - (slope * pairs[:, 0] + intercept)
+            self.models[is_max] = (float(slope), float(intercept), float(np.std(residuals)))
+
+    def bounds(
+        self,
+        is_max: bool,
+        alpha: float,
+        beta: float,
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Shallow values beyond which a node is cut off.
+
+        Returns the value at or below which the node fails low and the
+        value at or above which it fails high (None if there is none).
+        """
+        model = self.models.get(is_max)
+        if model is None:
+            return None, None
+        slope, intercept, sigma = model
+        margin = self.threshold * sigma
+        low = (alpha - margin - intercept) / slope if np.isfinite(alpha) else None
+        high = (beta + margin - intercept) / slope if np.isfinite(beta) else None
+        return low, high
+
+    def stats(self) -> dict:
+        """Counters since the last reset."""
+        return {
+            'tries': self.tries,
+            'cuts': self.cuts,
+            'cut_rate': self.cuts / self.tries if self.tries else 0.0,
+        }
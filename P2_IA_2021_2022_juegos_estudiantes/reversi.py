@@ -8,10 +8,11 @@
 
 from __future__ import annotations  # For Python 3.7
 
-import copy
+import random
+from collections.abc import Mapping
 from tkinter import *
 from tkinter import messagebox
-from typing import Any, Callable, List, Optional, Tuple
+from typing import Any, Callable, Iterable, List, Optional, Tuple
 
 import numpy as np
 
@@ -39,45 +40,107 @@ class Reversi(TwoPlayerGame):
         self.width = width
         self.max_score = height*width
         self.min_score = - self.max_score
+        self._corners = [(1, 1), (1, height), (width, 1), (width, height)]
+        # Squares in the order in which moves are generated, and rays
+        # from each square for move generation and flipping.
+        self._squares = [(x, y) for x in range(1, width + 1) for y in range(1, height + 1)]
+        self._rays = self._ray_table()
+        self._init_zobrist(
+            self._squares,
+            (self.player1.label, self.player2.label),
+        )
+        self._static_move_scores = self._corner_first_scores()
 
     # Private functions
-    def _capture_enemy_in_dir(self, board: dict, move, player_label: Any, delta_x_y) -> list:
-        enemy = self.player2.label if player_label == self.player1.label else self.player1.label
-        (delta_x, delta_y) = delta_x_y
-        x, y = move
-        x, y = x + delta_x, y + delta_y
-        enemy_list_0 = []
-        while board.get((x, y)) == enemy:
-            enemy_list_0.append((x, y))
-            x, y = x + delta_x, y + delta_y
-        if board.get((x, y)) != player_label:
-            del enemy_list_0[:]
-        x, y = move
-        x, y = x - delta_x, y - delta_y
-        enemy_list_1 = []
-        while board.get((x, y)) == enemy:
-            enemy_list_1.append((x, y))
-            x, y = x - delta_x, y - delta_y
-        if board.get((x, y)) != player_label:
-            del enemy_list_1[:]
-        return enemy_list_0 + enemy_list_1
+    def _corner_first_scores(self) -> dict:
+        """Corners first, then edges; squares next to a corner last."""
+        corners = self._corners
+        scores = {}
+        for x in range(1, self.width + 1):
+            for y in range(1, self.height + 1):
+                distance_to_corner = min(
+                    max(abs(x - corner_x), abs(y - corner_y))
+                    for corner_x, corner_y in corners
+                )
+                if distance_to_corner == 0:
+                    score = 3
+                elif distance_to_corner == 1:
+                    # diagonal neighbours of a corner are the worst
+                    diagonal = x not in (1, self.width) and y not in (1, self.height)
+                    score = -2 if diagonal else -1
+                elif x in (1, self.width) or y in (1, self.height):
+                    score = 1
+                else:
+                    score = 0
+                scores[self._matrix_to_display_coordinates((x, y))] = score
+        return scores
+
+    def _ray_table(self) -> dict:
+        """Rays of squares from every square to the edge, in the 8 directions.
+
+        Rays of less than 2 squares are left out: a capture needs at
+        least an enemy disc and a disc of the player after it.
+        """
+        rays = {}
+        for x in range(1, self.width + 1):
+            for y in range(1, self.height + 1):
+                square_rays = []
+                for delta_x in (-1, 0, 1):
+                    for delta_y in (-1, 0, 1):
+                        if delta_x == 0 and delta_y == 0:
+                            continue
+                        ray = []
+                        ray_x, ray_y = x + delta_x, y + delta_y
+                        while 1 <= ray_x <= self.width and 1 <= ray_y <= self.height:
+                            ray.append((ray_x, ray_y))
+                            ray_x, ray_y = ray_x + delta_x, ray_y + delta_y
+                        if len(ray) >= 2:
+                            square_rays.append(tuple(ray))
+                rays[(x, y)] = tuple(square_rays)
+        return rays
 
     def _enemy_captured_by_move(self, board: dict, move, player_label: Any) -> list:
-        return self._capture_enemy_in_dir(board, move, player_label, (0, 1)) \
-               + self._capture_enemy_in_dir(board, move, player_label, (1, 0)) \
-               + self._capture_enemy_in_dir(board, move, player_label, (1, -1)) \
-               + self._capture_enemy_in_dir(board, move, player_label, (1, 1))
+        enemy = self.player2.label if player_label == self.player1.label else self.player1.label
+        captured = []
+        for ray in self._rays[move]:
+            for n_enemies, square in enumerate(ray):
+                label = board.get(square)
+                if label != enemy:
+                    if label == player_label and n_enemies > 0:
+                        captured.extend(ray[:n_enemies])
+                    break
+        return captured
+
+    def _is_valid_move(self, board: dict, move, player_label: Any) -> bool:
+        """Whether playing on the (empty) square captures enemy discs."""
+        enemy = self.player2.label if player_label == self.player1.label else self.player1.label
+        for ray in self._rays[move]:
+            if board.get(ray[0]) != enemy:
+                continue
+            for square in ray[1:]:
+                label = board.get(square)
+                if label != enemy:
+                    if label == player_label:
+                        return True
+                    break
+        return False
 
     def _get_valid_moves(self, board: dict, player_label: Any) -> list:
         """Returns a list of valid moves for the player judging from the board."""
-        return [(x, y) for x in range(1, self.width + 1)
-                for y in range(1, self.height + 1)
-                if (x, y) not in board.keys() and
-                self._enemy_captured_by_move(board, (x, y), player_label)]
+        return [square for square in self._squares
+                if square not in board and
+                self._is_valid_move(board, square, player_label)]
 
     def _player_coins(self, board: dict, player_label: Any) -> float:
         return sum(x == player_label for x in board.values())
 
+    def _counts_after_move(self, state: TwoPlayerGameState, n_flips: int) -> Tuple[int, int]:
+        """Disc counts after the player to move places a disc and flips n_flips."""
+        black, white = state.disc_counts
+        if state.next_player.label == self.player1.label:
+            return black + 1 + n_flips, white - n_flips
+        return black - n_flips, white + 1 + n_flips
+
     def _coin_diff(self, board: dict) -> float:
         """Difference in the number of coins."""
         return 100 * (self._player_coins(board, self.player2.label) - self._player_coins(board, self.player1.label)) / len(board)
@@ -131,7 +194,7 @@ class Reversi(TwoPlayerGame):
         """Display state of the board."""
         super().display(state, gui)
         board = state.board
-        moves = self._get_valid_moves(board, state.next_player.label)
+        moves = state.get_valid_moves()
 
         # Console display
 
@@ -173,56 +236,149 @@ class Reversi(TwoPlayerGame):
         state: TwoPlayerGameState,
     ) -> List[TwoPlayerGameState]:
         """Generate the list of successors of a game state."""
-        successors = []
+        return [self.successor(state, move) for move in self.moves(state)]
+
+    def successor(
+        self,
+        state: TwoPlayerGameState,
+        move: Any,
+    ) -> TwoPlayerGameState:
+        """Successor of a game state for a move (None to pass)."""
         board = state.board
-        moves = self._get_valid_moves(board, state.next_player.label)
-
-        for move in moves:
-            board_successor = copy.deepcopy(state.board)
-            assert isinstance(state.next_player, Player)
-            # show the move on the board
-            board_successor[move] = state.next_player.label
-            # flip enemy
-            for enemy in self._enemy_captured_by_move(board, move, state.next_player.label):
-                board_successor[enemy] = state.next_player.label
-            move_code = self._matrix_to_display_coordinates(move)
-            successor = state.generate_successor(
+        assert isinstance(state.next_player, Player)
+        zobrist_key = state.zobrist_key ^ self._zobrist_side
+        # Squares and labels are immutable, so a shallow copy is enough. It
+        # is a plain dictionary also for the read-only boards of views.
+        board_successor = dict(board)
+        if move is None:
+            return state.generate_successor(
                 board_successor,
-                move_code,
+                None,
+                zobrist_key,
+                state.disc_counts,
             )
 
-            successors.append(successor)
-
-        if not successors:
-            board_successor = copy.deepcopy(state.board)
-            move_code = None
-            no_movement = state.generate_successor(
-                board_successor,
-                move_code,
+        label = state.next_player.label
+        enemy_label = self.opponent(state.next_player).label
+        # show the move on the board
+        board_successor[move] = label
+        successor_key = zobrist_key ^ self._zobrist_squares[(move, label)]
+        # flip enemy
+        flips = self._enemy_captured_by_move(board, move, label)
+        for enemy in flips:
+            board_successor[enemy] = label
+            successor_key ^= (
+                self._zobrist_squares[(enemy, enemy_label)]
+                ^ self._zobrist_squares[(enemy, label)]
             )
-            successors = [ no_movement ]
-
-        return successors
+        return state.generate_successor(
+            board_successor,
+            self._matrix_to_display_coordinates(move),
+            successor_key,
+            self._counts_after_move(state, len(flips)),
+        )
 
     def score(
         self,
         state: TwoPlayerGameState,
     ) -> Tuple[bool, Optional[np.ndarray]]:
         """Determine whether a game state is terminal."""
+        end_of_game = (
+            not state.get_valid_moves(self.player1)
+            and not state.get_valid_moves(self.player2)
+        )
+
+        # The disc counts are kept up to date by the successors.
+        scores = np.array(state.disc_counts, dtype=float)
+
+        return end_of_game, scores
+
+    def disc_counts(self, state: TwoPlayerGameState) -> Tuple[int, int]:
+        """Discs of player 1 and of player 2, counted from scratch."""
+        return (
+            int(self._player_coins(state.board, self.player1.label)),
+            int(self._player_coins(state.board, self.player2.label)),
+        )
+
+    def occupied_squares(self, board: dict) -> Iterable[Tuple[Any, Any]]:
+        """Pairs (square, label) of the pieces on the board."""
+        return board.items()
+
+    def valid_moves(self, state: TwoPlayerGameState, player: Player) -> list:
+        """Legal moves of a player in a game state."""
+        return self._get_valid_moves(state.board, player.label)
+
+    def moves(self, state: TwoPlayerGameState) -> list:
+        """Moves that can be played with make_move (None to pass)."""
+        return state.get_valid_moves() or [None]
+
+    def move_code(self, state: TwoPlayerGameState, move: Any) -> Any:
+        """Move code of the successor obtained by playing a move."""
+        return None if move is None else self._matrix_to_display_coordinates(move)
+
+    def static_move_score(self, move_code: Any) -> float:
+        """Corner-first a priori quality of a move."""
+        return self._static_move_scores.get(move_code, 0)
+
+    def tactical_moves(self, state: TwoPlayerGameState) -> list:
+        """Corner moves, and moves that change the corners the opponent can take."""
         board = state.board
-        moves = self._get_valid_moves(board, state.next_player.label)
+        label = state.next_player.label
+        enemy_label = self.opponent(state.next_player).label
+        empty_corners = [corner for corner in self._corners if corner not in board]
+        if not empty_corners:
+            return []
 
-        end_of_game = (len(
-            self._get_valid_moves(board, self.player1.label) +
-            self._get_valid_moves(board, self.player2.label)
-            ) == 0)
+        def enemy_corners(board: Any) -> list:
+            return [
+                corner for corner in empty_corners
+                if self._enemy_captured_by_move(board, corner, enemy_label)
+            ]
 
-        scores = np.zeros(self.n_players, dtype=float)
-        players = (self.player1, self.player2)
-        for i in range(len(players)):
-            scores[i] = self._player_coins(board, players[i].label)
+        enemy_corners_before = enemy_corners(board)
+        tactical = []
+        for move in state.get_valid_moves():
+            if move in empty_corners:
+                tactical.append(move)
+                continue
+            board_after = dict(board)
+            board_after[move] = label
+            for square in self._enemy_captured_by_move(board, move, label):
+                board_after[square] = label
+            if enemy_corners(board_after) != enemy_corners_before:
+                tactical.append(move)
+        return tactical
 
-        return end_of_game, scores
+    def _play_in_place(self, state: TwoPlayerGameState, move: Any) -> Any:
+        zobrist_key = state.zobrist_key ^ self._zobrist_side
+        flips = []
+        if move is not None:
+            board = state.board
+            label = state.next_player.label
+            enemy_label = self.opponent(state.next_player).label
+            flips = self._enemy_captured_by_move(board, move, label)
+            # Counted before the board changes, if they are not known yet.
+            state._disc_counts = self._counts_after_move(state, len(flips))
+            board[move] = label
+            zobrist_key ^= self._zobrist_squares[(move, label)]
+            for enemy in flips:
+                board[enemy] = label
+                zobrist_key ^= (
+                    self._zobrist_squares[(enemy, enemy_label)]
+                    ^ self._zobrist_squares[(enemy, label)]
+                )
+        state.move_code = self.move_code(state, move)
+        state._zobrist_key = zobrist_key
+        return move, flips
+
+    def _undo_in_place(self, state: TwoPlayerGameState, board_undo_info: Any) -> None:
+        move, flips = board_undo_info
+        if move is not None:
+            board = state.board
+            del board[move]
+            enemy_label = self.opponent(state.next_player).label
+            for enemy in flips:
+                board[enemy] = enemy_label
 
     def initialize_buttons(self, board: Any, gui_frame: Frame) -> dict:
         assert (board is not None)
@@ -272,6 +428,683 @@ class Reversi(TwoPlayerGame):
         gui_root.update()  # Refresh UI
 
 
+class BitBoard(Mapping):
+    """Reversi position stored as two integer bitmasks, one per colour.
+
+    Square (x, y) is bit (x - 1) * height + (y - 1), so that iterating
+    over the bits in increasing order visits the squares in the same
+    order as Reversi._get_valid_moves. The class is a read-only mapping
+    (x, y) -> label, so heuristics written for the dictionary board
+    keep working unchanged.
+    """
+
+    __slots__ = ('black', 'white', 'height', 'width', 'labels')
+
+    def __init__(
+        self,
+        black: int,
+        white: int,
+        height: int,
+        width: int,
+        labels: Tuple[Any, Any] = ('B', 'W'),
+    ) -> None:
+        self.black = black
+        self.white = white
+        self.height = height
+        self.width = width
+        self.labels = labels
+
+    @classmethod
+    def from_dictionary(
+        cls,
+        board_dictionary: dict,
+        height: int,
+        width: int,
+        labels: Tuple[Any, Any] = ('B', 'W'),
+    ) -> BitBoard:
+        """Build a bitboard from the dictionary representation."""
+        black = white = 0
+        for (x, y), label in board_dictionary.items():
+            bit = 1 << ((x - 1) * height + (y - 1))
+            if label == labels[0]:
+                black |= bit
+            elif label == labels[1]:
+                white |= bit
+            else:
+                raise ValueError('Unknown label {} at {}'.format(label, (x, y)))
+        return cls(black, white, height, width, labels)
+
+    def to_dictionary(self) -> dict:
+        """Dictionary representation of the board."""
+        return dict(self.items())
+
+    def read_only_view(self) -> FrozenBitBoard:
+        """Board with the same discs that cannot be modified."""
+        return FrozenBitBoard(self.black, self.white, self.height, self.width, self.labels)
+
+    def _bit(self, key: Any) -> int:
+        try:
+            x, y = key
+        except (TypeError, ValueError):
+            raise KeyError(key)
+        if not (1 <= x <= self.width and 1 <= y <= self.height):
+            raise KeyError(key)
+        return 1 << ((x - 1) * self.height + (y - 1))
+
+    def __getitem__(self, key: Any) -> Any:
+        bit = self._bit(key)
+        if self.black & bit:
+            return self.labels[0]
+        if self.white & bit:
+            return self.labels[1]
+        raise KeyError(key)
+
+    def __contains__(self, key: Any) -> bool:
+        try:
+            return bool((self.black | self.white) & self._bit(key))
+        except KeyError:
+            return False
+
+    def __iter__(self):
+        return iter(bits_to_squares(self.black | self.white, self.height))
+
+    def __len__(self) -> int:
+        return popcount(self.black | self.white)
+
+    def __repr__(self) -> str:
+        return 'BitBoard({})'.format(self.to_dictionary())
+
+
+class FrozenBitBoard(BitBoard):
+    """BitBoard that cannot be modified.
+
+    Copies (copy.copy, copy.deepcopy) are ordinary bitboards.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        black: int,
+        white: int,
+        height: int,
+        width: int,
+        labels: Tuple[Any, Any] = ('B', 'W'),
+    ) -> None:
+        for name, value in zip(BitBoard.__slots__, (black, white, height, width, labels)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise TypeError('This bitboard cannot be modified')
+
+    def __delattr__(self, name: str) -> None:
+        raise TypeError('This bitboard cannot be modified')
+
+    def read_only_view(self) -> FrozenBitBoard:
+        return self
+
+    def __copy__(self) -> BitBoard:
+        return BitBoard(self.black, self.white, self.height, self.width, self.labels)
+
+    def __deepcopy__(self, memo: dict) -> BitBoard:
+        return self.__copy__()
+
+
+def popcount(bits: int) -> int:
+    """Number of bits set in a bitmask."""
+    return bin(bits).count('1')
+
+
+def bits_to_squares(bits: int, height: int) -> list:
+    """Squares (x, y) of the bits set in a bitmask, in increasing bit order."""
+    squares = []
+    while bits:
+        low_bit = bits & -bits
+        index = low_bit.bit_length() - 1
+        squares.append((index // height + 1, index % height + 1))
+        bits ^= low_bit
+    return squares
+
+
+class BitboardReversi(Reversi):
+    """Reversi with the board stored as two bitmasks.
+
+    Moves are generated and discs flipped with shift-and-mask operations
+    on Python integers, which works for any board size. States use
+    BitBoard boards; dictionary boards (e.g. the output of
+    from_array_to_dictionary_board) are converted on the fly.
+    """
+
+    def __init__(
+        self,
+        player1: Player,
+        player2: Player,
+        height: int,
+        width: int,
+    ) -> None:
+        super().__init__(player1, player2, height, width)
+        self._full_mask = (1 << (height * width)) - 1
+        first_row = sum(1 << (i * height) for i in range(width))
+        last_row = first_row << (height - 1)
+        # (shift, mask) per direction; the mask removes the bits that
+        # wrapped around the top or bottom edge after the shift.
+        self._directions = []
+        for delta_x in (-1, 0, 1):
+            for delta_y in (-1, 0, 1):
+                if delta_x == 0 and delta_y == 0:
+                    continue
+                mask = self._full_mask
+                if delta_y == 1:
+                    mask &= ~first_row
+                elif delta_y == -1:
+                    mask &= ~last_row
+                self._directions.append((delta_x * height + delta_y, mask))
+        self._max_run = max(height, width) - 2
+        self._corner_mask = sum(
+            1 << ((x - 1) * height + (y - 1)) for x, y in self._corners
+        )
+        # Squares on the row, column and diagonal of each corner: only
+        # discs there decide whether a corner can be taken.
+        self._corner_lines = {}
+        for corner_x, corner_y in self._corners:
+            line = 0
+            for x in range(1, width + 1):
+                for y in range(1, height + 1):
+                    if (
+                        x == corner_x or y == corner_y
+                        or abs(x - corner_x) == abs(y - corner_y)
+                    ):
+                        line |= 1 << ((x - 1) * height + (y - 1))
+            self._corner_lines[1 << ((corner_x - 1) * height + (corner_y - 1))] = line
+
+    # Private functions
+    def _to_bitboard(self, board: Any) -> BitBoard:
+        if isinstance(board, BitBoard):
+            return board
+        return BitBoard.from_dictionary(
+            board,
+            self.height,
+            self.width,
+            (self.player1.label, self.player2.label),
+        )
+
+    def _own_and_enemy(self, board: BitBoard, player_label: Any) -> Tuple[int, int]:
+        if player_label == self.player1.label:
+            return board.black, board.white
+        return board.white, board.black
+
+    def _move_mask(self, own: int, enemy: int) -> int:
+        """Bitmask of the legal moves for the player owning `own`."""
+        empty = self._full_mask & ~(own | enemy)
+        moves = 0
+        for shift, mask in self._directions:
+            enemy_mask = enemy & mask
+            if shift > 0:
+                run = (own << shift) & enemy_mask
+                for _ in range(self._max_run):
+                    run |= (run << shift) & enemy_mask
+                moves |= (run << shift) & mask & empty
+            else:
+                run = (own >> -shift) & enemy_mask
+                for _ in range(self._max_run):
+                    run |= (run >> -shift) & enemy_mask
+                moves |= (run >> -shift) & mask & empty
+        return moves
+
+    def _flip_mask(self, own: int, enemy: int, move_bit: int) -> int:
+        """Bitmask of the enemy discs flipped by playing `move_bit`."""
+        flips = 0
+        for shift, mask in self._directions:
+            line = 0
+            if shift > 0:
+                square = (move_bit << shift) & mask
+                while square & enemy:
+                    line |= square
+                    square = (square << shift) & mask
+            else:
+                square = (move_bit >> -shift) & mask
+                while square & enemy:
+                    line |= square
+                    square = (square >> -shift) & mask
+            if square & own:
+                flips |= line
+        return flips
+
+    def _corners_taken(self, own: int, enemy: int, empty_corners: int) -> int:
+        """Bitmask of the empty corners that the player owning `own` can take."""
+        corners = 0
+        for corner_bit in self._corner_lines:
+            if corner_bit & empty_corners and self._flip_mask(own, enemy, corner_bit):
+                corners |= corner_bit
+        return corners
+
+    def _enemy_captured_by_move(self, board: Any, move, player_label: Any) -> list:
+        board = self._to_bitboard(board)
+        own, enemy = self._own_and_enemy(board, player_label)
+        move_bit = 1 << ((move[0] - 1) * self.height + (move[1] - 1))
+        if (own | enemy) & move_bit:
+            return []
+        return bits_to_squares(self._flip_mask(own, enemy, move_bit), self.height)
+
+    def _get_valid_moves(self, board: Any, player_label: Any) -> list:
+        """Returns a list of valid moves for the player judging from the board."""
+        board = self._to_bitboard(board)
+        own, enemy = self._own_and_enemy(board, player_label)
+        return bits_to_squares(self._move_mask(own, enemy), self.height)
+
+    def _player_coins(self, board: Any, player_label: Any) -> float:
+        board = self._to_bitboard(board)
+        own, _ = self._own_and_enemy(board, player_label)
+        return popcount(own)
+
+    # Public methods
+
+    def initialize_board(self) -> BitBoard:
+        """Initialize board with standard configuration."""
+        return self._to_bitboard(super().initialize_board())
+
+    def successor(
+        self,
+        state: TwoPlayerGameState,
+        move: Any,
+    ) -> TwoPlayerGameState:
+        """Successor of a game state for a move (None to pass)."""
+        board = self._to_bitboard(state.board)
+        assert isinstance(state.next_player, Player)
+        zobrist_key = state.zobrist_key ^ self._zobrist_side
+        if move is None:
+            return state.generate_successor(
+                BitBoard(board.black, board.white, self.height, self.width, board.labels),
+                None,
+                zobrist_key,
+                state.disc_counts,
+            )
+
+        label = state.next_player.label
+        enemy_label = self.opponent(state.next_player).label
+        own, enemy = self._own_and_enemy(board, label)
+        move_bit = 1 << ((move[0] - 1) * self.height + (move[1] - 1))
+        flips = self._flip_mask(own, enemy, move_bit)
+        successor_key = zobrist_key ^ self._zobrist_squares[(move, label)]
+        for square in bits_to_squares(flips, self.height):
+            successor_key ^= (
+                self._zobrist_squares[(square, enemy_label)]
+                ^ self._zobrist_squares[(square, label)]
+            )
+        new_own = own | move_bit | flips
+        new_enemy = enemy & ~flips
+        if label == self.player1.label:
+            black, white = new_own, new_enemy
+        else:
+            black, white = new_enemy, new_own
+        return state.generate_successor(
+            BitBoard(black, white, self.height, self.width, board.labels),
+            self._matrix_to_display_coordinates(move),
+            successor_key,
+            self._counts_after_move(state, popcount(flips)),
+        )
+
+    def tactical_moves(self, state: TwoPlayerGameState) -> list:
+        """Corner moves, and moves that change the corners the opponent can take."""
+        board = self._to_bitboard(state.board)
+        own, enemy = self._own_and_enemy(board, state.next_player.label)
+        moves = self._move_mask(own, enemy)
+        empty_corners = self._corner_mask & ~(own | enemy)
+        if not empty_corners:
+            return []
+        enemy_corners = self._corners_taken(enemy, own, empty_corners)
+        corner_lines = 0
+        for corner_bit, line in self._corner_lines.items():
+            if corner_bit & empty_corners:
+                corner_lines |= line
+        tactical = moves & self._corner_mask
+        rest = moves & ~self._corner_mask
+        while rest:
+            move_bit = rest & -rest
+            rest ^= move_bit
+            flips = self._flip_mask(own, enemy, move_bit)
+            if not (move_bit | flips) & corner_lines:
+                continue
+            new_enemy_corners = self._corners_taken(
+                enemy & ~flips, own | move_bit | flips, empty_corners,
+            )
+            if new_enemy_corners != enemy_corners:
+                tactical |= move_bit
+        return bits_to_squares(tactical, self.height)
+
+    def random_playout(self, state: TwoPlayerGameState, rng: random.Random) -> np.ndarray:
+        """Play random moves to the end of the game on a pair of bitmasks."""
+        board = self._to_bitboard(state.board)
+        own, enemy = self._own_and_enemy(board, state.next_player.label)
+        is_black = state.next_player.label == self.player1.label
+        passes = 0
+        while passes < 2:  # The game ends when both players pass.
+            moves = self._move_mask(own, enemy)
+            if moves:
+                passes = 0
+                # Clear a random number of the lowest bits, take the next one.
+                for _ in range(rng.randrange(popcount(moves))):
+                    moves &= moves - 1
+                move_bit = moves & -moves
+                flips = self._flip_mask(own, enemy, move_bit)
+                own, enemy = own | move_bit | flips, enemy & ~flips
+            else:
+                passes += 1
+            own, enemy = enemy, own
+            is_black = not is_black
+        black, white = (own, enemy) if is_black else (enemy, own)
+        return np.array([popcount(black), popcount(white)], dtype=float)
+
+    def _play_in_place(self, state: TwoPlayerGameState, move: Any) -> Any:
+        state.board = board = self._to_bitboard(state.board)
+        undo_info = (board.black, board.white)
+        zobrist_key = state.zobrist_key ^ self._zobrist_side
+        if move is not None:
+            label = state.next_player.label
+            enemy_label = self.opponent(state.next_player).label
+            own, enemy = self._own_and_enemy(board, label)
+            move_bit = 1 << ((move[0] - 1) * self.height + (move[1] - 1))
+            flips = self._flip_mask(own, enemy, move_bit)
+            state._disc_counts = self._counts_after_move(state, popcount(flips))
+            zobrist_key ^= self._zobrist_squares[(move, label)]
+            for square in bits_to_squares(flips, self.height):
+                zobrist_key ^= (
+                    self._zobrist_squares[(square, enemy_label)]
+                    ^ self._zobrist_squares[(square, label)]
+                )
+            own, enemy = own | move_bit | flips, enemy & ~flips
+            if label == self.player1.label:
+                board.black, board.white = own, enemy
+            else:
+                board.black, board.white = enemy, own
+        state.move_code = self.move_code(state, move)
+        state._zobrist_key = zobrist_key
+        return undo_info
+
+    def _undo_in_place(self, state: TwoPlayerGameState, board_undo_info: Any) -> None:
+        state.board.black, state.board.white = board_undo_info
+
+
+class ArrayBoard(Mapping):
+    """Reversi position stored as a flat np.int8 array.
+
+    Cell (x - 1) * height + (y - 1) (the order of BitBoard) holds +1 for
+    a disc of the first label, -1 for one of the second and 0 if the
+    square is empty, so that counts and weighted sums of squares are
+    vectorized (count, weighted_sum). Like BitBoard, the class is a
+    read-only mapping (x, y) -> label for the heuristics written for the
+    dictionary board.
+    """
+
+    __slots__ = ('cells', 'height', 'width', 'labels')
+
+    def __init__(
+        self,
+        cells: np.ndarray,
+        height: int,
+        width: int,
+        labels: Tuple[Any, Any] = ('B', 'W'),
+    ) -> None:
+        self.cells = cells
+        self.height = height
+        self.width = width
+        self.labels = labels
+
+    @classmethod
+    def from_dictionary(
+        cls,
+        board_dictionary: Mapping,
+        height: int,
+        width: int,
+        labels: Tuple[Any, Any] = ('B', 'W'),
+    ) -> ArrayBoard:
+        """Build an array board from the dictionary representation (or a BitBoard)."""
+        cells = np.zeros(height * width, dtype=np.int8)
+        for (x, y), label in board_dictionary.items():
+            if label == labels[0]:
+                cells[(x - 1) * height + (y - 1)] = 1
+            elif label == labels[1]:
+                cells[(x - 1) * height + (y - 1)] = -1
+            else:
+                raise ValueError('Unknown label {} at {}'.format(label, (x, y)))
+        return cls(cells, height, width, labels)
+
+    def to_dictionary(self) -> dict:
+        """Dictionary representation of the board."""
+        return dict(self.items())
+
+    def count(self, label: Any) -> int:
+        """Number of discs of a label."""
+        return int(np.count_nonzero(self.cells == (1 if label == self.labels[0] else -1)))
+
+    def weighted_sum(self, weights: np.ndarray) -> float:
+        """Weights of the squares of the first label minus those of the second.
+
+        weights[x - 1, y - 1] is the weight of square (x, y).
+        """
+        return float(np.dot(self.cells, np.asarray(weights, dtype=float).ravel()))
+
+    def read_only_view(self) -> ArrayBoard:
+        """Board sharing the cells, which cannot be modified through it."""
+        cells = self.cells.view()
+        cells.flags.writeable = False
+        return ArrayBoard(cells, self.height, self.width, self.labels)
+
+    def _index(self, key: Any) -> int:
+        try:
+            x, y = key
+        except (TypeError, ValueError):
+            raise KeyError(key)
+        if not (1 <= x <= self.width and 1 <= y <= self.height):
+            raise KeyError(key)
+        return (x - 1) * self.height + (y - 1)
+
+    def __getitem__(self, key: Any) -> Any:
+        cell = self.cells[self._index(key)]
+        if cell == 1:
+            return self.labels[0]
+        if cell == -1:
+            return self.labels[1]
+        raise KeyError(key)
+
+    def __contains__(self, key: Any) -> bool:
+        try:
+            return bool(self.cells[self._index(key)])
+        except KeyError:
+            return False
+
+    def __iter__(self):
+        return (
+            (index // self.height + 1, index % self.height + 1)
+            for index in np.flatnonzero(self.cells).tolist()
+        )
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.cells))
+
+    def __deepcopy__(self, memo: dict) -> ArrayBoard:
+        return ArrayBoard(self.cells.copy(), self.height, self.width, self.labels)
+
+    def __repr__(self) -> str:
+        return 'ArrayBoard({})'.format(self.to_dictionary())
+
+
+class ArrayReversi(Reversi):
+    """Reversi with the board stored as a flat np.int8 array (ArrayBoard).
+
+    Moves are generated and discs flipped with the ray tables of Reversi
+    translated to indices of the array; discs are counted with NumPy.
+    States use ArrayBoard boards; dictionary boards are converted on the
+    fly. Heuristics can use the vectorized methods of the board (see
+    heuristic.array_board), and the ones written for dictionaries still
+    work through the mapping interface.
+    """
+
+    def __init__(
+        self,
+        player1: Player,
+        player2: Player,
+        height: int,
+        width: int,
+    ) -> None:
+        super().__init__(player1, player2, height, width)
+        index = {square: i for i, square in enumerate(self._squares)}
+        self._index_rays = [
+            tuple(tuple(index[square] for square in ray) for ray in self._rays[square])
+            for square in self._squares
+        ]
+
+    # Private functions
+    def _to_array_board(self, board: Any) -> ArrayBoard:
+        if isinstance(board, ArrayBoard):
+            return board
+        return ArrayBoard.from_dictionary(
+            board,
+            self.height,
+            self.width,
+            (self.player1.label, self.player2.label),
+        )
+
+    def _sign(self, player_label: Any) -> int:
+        return 1 if player_label == self.player1.label else -1
+
+    def _captured_indices(self, cells: list, index: int, sign: int) -> list:
+        """Indices of the enemy discs flipped by playing on cells[index].
+
+        cells is the board as a list (indexing a list is faster than
+        indexing the array element by element).
+        """
+        captured = []
+        for ray in self._index_rays[index]:
+            for n_enemies, ray_index in enumerate(ray):
+                cell = cells[ray_index]
+                if cell != -sign:
+                    if cell == sign and n_enemies > 0:
+                        captured.extend(ray[:n_enemies])
+                    break
+        return captured
+
+    def _enemy_captured_by_move(self, board: Any, move, player_label: Any) -> list:
+        board = self._to_array_board(board)
+        index = (move[0] - 1) * self.height + (move[1] - 1)
+        cells = board.cells.tolist()
+        if cells[index]:
+            return []
+        return [
+            self._squares[captured]
+            for captured in self._captured_indices(cells, index, self._sign(player_label))
+        ]
+
+    def _get_valid_moves(self, board: Any, player_label: Any) -> list:
+        """Returns a list of valid moves for the player judging from the board."""
+        board = self._to_array_board(board)
+        cells = board.cells.tolist()
+        sign = self._sign(player_label)
+        moves = []
+        for index, cell in enumerate(cells):
+            if cell:
+                continue
+            for ray in self._index_rays[index]:
+                if cells[ray[0]] != -sign:
+                    continue
+                found = False
+                for ray_index in ray[1:]:
+                    if cells[ray_index] != -sign:
+                        found = cells[ray_index] == sign
+                        break
+                if found:
+                    moves.append(self._squares[index])
+                    break
+        return moves
+
+    def _player_coins(self, board: Any, player_label: Any) -> float:
+        return self._to_array_board(board).count(player_label)
+
+    # Public methods
+
+    def initialize_board(self) -> ArrayBoard:
+        """Initialize board with standard configuration."""
+        return self._to_array_board(super().initialize_board())
+
+    def successor(
+        self,
+        state: TwoPlayerGameState,
+        move: Any,
+    ) -> TwoPlayerGameState:
+        """Successor of a game state for a move (None to pass)."""
+        board = self._to_array_board(state.board)
+        assert isinstance(state.next_player, Player)
+        zobrist_key = state.zobrist_key ^ self._zobrist_side
+        successor_cells = board.cells.copy()
+        if move is None:
+            return state.generate_successor(
+                ArrayBoard(successor_cells, self.height, self.width, board.labels),
+                None,
+                zobrist_key,
+                state.disc_counts,
+            )
+
+        label = state.next_player.label
+        enemy_label = self.opponent(state.next_player).label
+        sign = self._sign(label)
+        index = (move[0] - 1) * self.height + (move[1] - 1)
+        flips = self._captured_indices(board.cells.tolist(), index, sign)
+        successor_key = zobrist_key ^ self._zobrist_squares[(move, label)]
+        for flipped in flips:
+            square = self._squares[flipped]
+            successor_key ^= (
+                self._zobrist_squares[(square, enemy_label)]
+                ^ self._zobrist_squares[(square, label)]
+            )
+        successor_cells[index] = sign
+        successor_cells[flips] = sign
+        return state.generate_successor(
+            ArrayBoard(successor_cells, self.height, self.width, board.labels),
+            self._matrix_to_display_coordinates(move),
+            successor_key,
+            self._counts_after_move(state, len(flips)),
+        )
+
+    def disc_counts(self, state: TwoPlayerGameState) -> Tuple[int, int]:
+        """Discs of player 1 and of player 2, counted from scratch."""
+        # Counts of -1, 0 and +1: discs of player 2, empty squares, discs of player 1.
+        counts = np.bincount(self._to_array_board(state.board).cells + 1, minlength=3)
+        return int(counts[2]), int(counts[0])
+
+    def _play_in_place(self, state: TwoPlayerGameState, move: Any) -> Any:
+        state.board = board = self._to_array_board(state.board)
+        zobrist_key = state.zobrist_key ^ self._zobrist_side
+        index, flips = None, []
+        if move is not None:
+            label = state.next_player.label
+            enemy_label = self.opponent(state.next_player).label
+            sign = self._sign(label)
+            index = (move[0] - 1) * self.height + (move[1] - 1)
+            flips = self._captured_indices(board.cells.tolist(), index, sign)
+            state._disc_counts = self._counts_after_move(state, len(flips))
+            zobrist_key ^= self._zobrist_squares[(move, label)]
+            for flipped in flips:
+                square = self._squares[flipped]
+                zobrist_key ^= (
+                    self._zobrist_squares[(square, enemy_label)]
+                    ^ self._zobrist_squares[(square, label)]
+                )
+            board.cells[index] = sign
+            board.cells[flips] = sign
+        state.move_code = self.move_code(state, move)
+        state._zobrist_key = zobrist_key
+        return index, flips
+
+    def _undo_in_place(self, state: TwoPlayerGameState, board_undo_info: Any) -> None:
+        index, flips = board_undo_info
+        if index is not None:
+            cells = state.board.cells
+            # The player who moved owns the flipped discs.
+            sign = cells[index]
+            cells[index] = 0
+            cells[flips] = -sign
+
+
 def from_array_to_dictionary_board(board_array):
     """Create a state from an initial board."""
     if board_array is None:
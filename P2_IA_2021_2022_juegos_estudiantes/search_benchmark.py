@@ -0,0 +1,411 @@
+"""Comparison of search strategies on a common set of positions.
+
+    The strategies search the same positions, and the nodes visited,
+    the time, the moves and the values are reported side by side. Run as
+    a script to compare move orderings and search algorithms in Reversi.
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+from game import Player, TwoPlayerGame, TwoPlayerGameState, TwoPlayerMatch
+from heuristic import Heuristic
+from move_ordering import MoveOrdering
+from strategy import (MinimaxAlphaBetaStrategy, ParallelMCTSStrategy,
+                      PVSStrategy, SearchStrategy, Strategy)
+
+
+def random_positions(
+    initial_state: TwoPlayerGameState,
+    n_positions: int,
+    min_plies: int = 4,
+    max_plies: int = 20,
+    seed: Optional[int] = None,
+) -> List[TwoPlayerGameState]:
+    """Positions reached by playing random moves from a state.
+
+    Positions in which the game is over are discarded.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < n_positions:
+        state = initial_state.setup_match()
+        for _ in range(rng.randint(min_plies, max_plies)):
+            if state.end_of_game:
+                break
+            state = rng.choice(state.game.generate_successors(state)).setup_match()
+        if not state.end_of_game:
+            positions.append(state)
+    return positions
+
+
+def compare_strategies(
+    positions: List[TwoPlayerGameState],
+    strategies: Dict[str, SearchStrategy],
+) -> Dict[str, dict]:
+    """Search every position with every strategy.
+
+    For each strategy, returns the total nodes visited and seconds, the
+    moves and values found, and the reduction in nodes visited with
+    respect to the first strategy.
+    """
+    results = {}
+    for name, strategy in strategies.items():
+        nodes_visited = 0
+        start = time.perf_counter()
+        moves, values = [], []
+        for state in positions:
+            successor = strategy.next_move(state.clone())
+            nodes_visited += strategy.nodes_visited
+            moves.append(successor.move_code)
+            values.append(successor.minimax_value)
+        results[name] = {
+            'nodes': nodes_visited,
+            'seconds': time.perf_counter() - start,
+            'moves': moves,
+            'values': values,
+        }
+
+    reference_nodes = next(iter(results.values()))['nodes']
+    for result in results.values():
+        result['node_reduction'] = 1 - result['nodes'] / reference_nodes
+    return results
+
+
+def compare_move_orderings(
+    positions: List[TwoPlayerGameState],
+    heuristic: Heuristic,
+    depth: int,
+    orderings: Dict[str, Optional[MoveOrdering]],
+    **kwargs,
+) -> Dict[str, dict]:
+    """Compare alpha-beta searches to a fixed depth with several move orderings.
+
+    kwargs are passed to MinimaxAlphaBetaStrategy, e.g. a transposition
+    table. All the orderings have to find the same values.
+    """
+    strategies = {
+        name: MinimaxAlphaBetaStrategy(
+            heuristic=heuristic,
+            max_depth_minimax=depth,
+            move_ordering=ordering,
+            **kwargs,
+        )
+        for name, ordering in orderings.items()
+    }
+    return compare_strategies(positions, strategies)
+
+
+def match_points(
+    positions: List[TwoPlayerGameState],
+    strategy: Strategy,
+    opponent: Strategy,
+    max_seconds_per_move: float = 60,
+) -> float:
+    """Points of a strategy against an opponent, playing from every position.
+
+    Each position is played twice, with the strategy moving first and
+    second. A win is worth 1 point and a draw 1/2.
+    """
+    points = 0.0
+    for position in positions:
+        for strategy_moves_first in (True, False):
+            state = position.clone()
+            game = state.game
+            # The players of the copy of the game, with the strategies.
+            first = game.player1 if state.next_player.label == game.player1.label else game.player2
+            second = game.opponent(first)
+            if strategy_moves_first:
+                first.strategy, second.strategy = strategy, opponent
+            else:
+                first.strategy, second.strategy = opponent, strategy
+            state.next_player = first
+            scores = TwoPlayerMatch(state, max_seconds_per_move=max_seconds_per_move).play_match()
+            player = first if strategy_moves_first else second
+            own, other = (0, 1) if player is game.player1 else (1, 0)
+            if scores[own] > scores[other]:
+                points += 1
+            elif scores[own] == scores[other]:
+                points += 0.5
+    return points
+
+
+def compare_pruning(
+    positions: List[TwoPlayerGameState],
+    match_positions: List[TwoPlayerGameState],
+    strategies: Dict[str, MinimaxAlphaBetaStrategy],
+) -> Dict[str, dict]:
+    """Node savings and strength loss of pruning options.
+
+    The first strategy is the reference, searching the full tree. Besides
+    the results of compare_strategies, returns for each strategy the
+    rate of moves equal to those of the reference and its points against
+    the reference in the matches played from match_positions.
+    """
+    results = compare_strategies(positions, strategies)
+    reference_name, reference = next(iter(strategies.items()))
+    reference_moves = results[reference_name]['moves']
+    for name, strategy in strategies.items():
+        result = results[name]
+        result['same_moves'] = sum(
+            move == reference_move
+            for move, reference_move in zip(result['moves'], reference_moves)
+        ) / len(reference_moves)
+        result['points'] = (
+            match_points(match_positions, strategy, reference)
+            if strategy is not reference else len(match_positions)
+        )
+        result['games'] = 2 * len(match_positions)
+    return results
+
+
+def playout_rates(
+    state: TwoPlayerGameState,
+    workers: List[int],
+    seconds: float = 1.0,
+    parallelism: str = 'root',
+) -> Dict[int, float]:
+    """Playouts per second of ParallelMCTSStrategy for several numbers of workers."""
+    rates = {}
+    for n_workers in workers:
+        strategy = ParallelMCTSStrategy(
+            workers=n_workers,
+            parallelism=parallelism,
+            max_iterations=None,
+            max_seconds_per_move=seconds,
+            seed=0,
+        )
+        strategy.next_move(state.clone())
+        rates[n_workers] = strategy.playouts_per_second()
+    return rates
+
+
+def print_comparison(results: Dict[str, dict]) -> None:
+    """Print the table of results of compare_strategies (or compare_pruning)."""
+    pruning = 'points' in next(iter(results.values()))
+    print('{:>24s} {:>10s} {:>9s} {:>9s}'.format(
+        'strategy', 'nodes', 'seconds', 'saved')
+        + (' {:>10s} {:>9s}'.format('same move', 'points') if pruning else ''))
+    for name, result in results.items():
+        print('{:>24s} {:>10d} {:>9.2f} {:>8.1f}%'.format(
+            name,
+            result['nodes'],
+            result['seconds'],
+            100 * result['node_reduction'],
+        ) + (' {:>9.1f}% {:>4g}/{:<4d}'.format(
+            100 * result['same_moves'], result['points'], result['games'],
+        ) if pruning else ''))
+
+
+if __name__ == '__main__':
+    import batch
+    from endgame import EndgameSolver
+    from heuristic import heuristic_2
+    from probcut import ProbCut
+    from reversi import BitboardReversi
+    from strategy import RandomStrategy
+    from transposition import TranspositionTable
+
+    player1 = Player(name='Player 1', strategy=RandomStrategy())
+    player2 = Player(name='Player 2', strategy=RandomStrategy())
+    game: TwoPlayerGame = BitboardReversi(player1, player2, 8, 8)
+    positions = random_positions(
+        TwoPlayerGameState(game=game, initial_player=player1),
+        n_positions=10,
+        seed=0,
+    )
+
+    results = compare_move_orderings(
+        positions,
+        heuristic_2,
+        depth=4,
+        orderings={
+            'generation order': None,
+            'corners first': MoveOrdering(
+                tt_move=False, killers=0, history=False, static=True,
+            ),
+            'killers': MoveOrdering(tt_move=False, history=False),
+            'killers + history': MoveOrdering(tt_move=False),
+            'killers + history + static': MoveOrdering(tt_move=False, static=True),
+        },
+    )
+    print_comparison(results)
+
+    print('\nWith a transposition table, iterative deepening to depth 4:')
+    strategies = {
+        name: MinimaxAlphaBetaStrategy(
+            heuristic=heuristic_2,
+            max_depth_minimax=4,
+            transposition_table=TranspositionTable(),
+            max_seconds_per_move=1000,
+            move_ordering=ordering,
+        )
+        for name, ordering in {
+            'generation order': None,
+            'tt move': MoveOrdering(killers=0, history=False),
+            'all': MoveOrdering(static=True),
+        }.items()
+    }
+    print_comparison(compare_strategies(positions, strategies))
+
+    print('\nRoot windows of alpha-beta, iterative deepening to depth 5:')
+    strategies = {
+        name: MinimaxAlphaBetaStrategy(
+            heuristic=heuristic_2,
+            max_depth_minimax=5,
+            transposition_table=TranspositionTable(),
+            max_seconds_per_move=1000,
+            move_ordering=MoveOrdering(static=True),
+            in_place=True,
+            **window_options,
+        )
+        for name, window_options in {
+            'full window': {},
+            'aspiration window 1': {'aspiration_window': 1},
+            'aspiration window 4': {'aspiration_window': 4},
+            'mtd(f)': {'mtdf': True},
+        }.items()
+    }
+    print_comparison(compare_strategies(positions, strategies))
+
+    print('\nAlpha-beta and principal variation search to depth 5:')
+    strategies = {
+        name: strategy_class(
+            heuristic=heuristic_2,
+            max_depth_minimax=5,
+            transposition_table=TranspositionTable(),
+            max_seconds_per_move=1000,
+            move_ordering=MoveOrdering(static=True),
+            in_place=True,
+        )
+        for name, strategy_class in {
+            'alpha-beta': MinimaxAlphaBetaStrategy,
+            'pvs': PVSStrategy,
+        }.items()
+    }
+    print_comparison(compare_strategies(positions, strategies))
+
+    print('\nSuccessors of alpha-beta to depth 4 (same nodes): all created, lazily, in place:')
+    strategies = {
+        name: MinimaxAlphaBetaStrategy(
+            heuristic=heuristic_2,
+            max_depth_minimax=4,
+            move_ordering=MoveOrdering(static=True),
+            **options,
+        )
+        for name, options in {
+            'all successors': {},
+            'lazy successors': {'lazy': True},
+            'in place': {'in_place': True},
+        }.items()
+    }
+    print_comparison(compare_strategies(positions, strategies))
+
+    print('\nQuiescence search of corner fights against a full extra ply:')
+    strategies = {
+        '{} plies + quiescence {}'.format(depth, quiescence_depth): MinimaxAlphaBetaStrategy(
+            heuristic=heuristic_2,
+            max_depth_minimax=depth,
+            in_place=True,
+            quiescence_depth=quiescence_depth,
+        )
+        for depth, quiescence_depth in ((3, 0), (3, 2), (4, 0))
+    }
+    print_comparison(compare_strategies(positions, strategies))
+
+    print('\nLate move reductions and ProbCut at depth 5, and points in matches against full alpha-beta:')
+    probcut = ProbCut(depth=4, shallow_depth=2, threshold=1.0)
+    strategies = {
+        name: MinimaxAlphaBetaStrategy(
+            heuristic=heuristic_2,
+            max_depth_minimax=5,
+            transposition_table=TranspositionTable(),
+            move_ordering=MoveOrdering(static=True),
+            in_place=True,
+            **kwargs,
+        )
+        for name, kwargs in {
+            'alpha-beta': {},
+            'late move reductions': {'late_move_reduction': 3},
+            'probcut': {'probcut': probcut},
+            'both': {'late_move_reduction': 3, 'probcut': probcut},
+        }.items()
+    }
+    # The model of ProbCut is fitted to positions other than those compared.
+    strategies['probcut'].calibrate_probcut(random_positions(
+        TwoPlayerGameState(game=game, initial_player=player1),
+        n_positions=30,
+        max_plies=40,
+        seed=1,
+    ))
+    print_comparison(compare_pruning(positions, positions[:3], strategies))
+
+    print('\nDepth reached by alpha-beta in 2 seconds per move:')
+    for n_workers in sorted({1, os.cpu_count()}):
+        strategy = MinimaxAlphaBetaStrategy(
+            heuristic=heuristic_2,
+            max_depth_minimax=64,
+            transposition_table=TranspositionTable(),
+            max_seconds_per_move=2,
+            move_ordering=MoveOrdering(static=True),
+            workers=n_workers,
+        )
+        depths = []
+        for state in positions[:3]:
+            strategy.next_move(state.clone())
+            depths.append(strategy.depth_reached)
+        print('{:>24s} {}'.format('{} workers'.format(n_workers), depths))
+
+    print('\nPlayouts per second of Monte Carlo tree search (root parallelization):')
+    workers = [1]
+    while workers[-1] * 2 <= os.cpu_count():
+        workers.append(workers[-1] * 2)
+    for n_workers, rate in playout_rates(positions[0], workers).items():
+        print('{:>24d} {:>10.0f}'.format(n_workers, rate))
+
+    print('\nEndgame solver on positions with at most 10 empty squares:')
+    endgame_positions = random_positions(
+        TwoPlayerGameState(game=game, initial_player=player1),
+        n_positions=5,
+        min_plies=50,
+        max_plies=52,
+        seed=0,
+    )
+    for mode in ('exact', 'wld'):
+        solver = EndgameSolver(mode=mode)
+        for state in endgame_positions:
+            if solver.applies(state):
+                solver.value(state)
+        stats = solver.stats()
+        print('{:>24s} {:>10d} nodes {:>9.2f}s {:>10.0f} nodes/s'.format(
+            mode, stats['nodes'], stats['seconds'], stats['nodes_per_second'],
+        ))
+
+    print('\nMoves and flips of the leaves of a depth-3 tree, one by one and batched:')
+    leaves = [positions[0]]
+    for _ in range(3):
+        leaves = [
+            successor for leaf in leaves
+            for successor in game.generate_successors(leaf)
+        ]
+    start = time.perf_counter()
+    for leaf in leaves:
+        for move in leaf.get_valid_moves():
+            game._enemy_captured_by_move(leaf.board, move, leaf.next_player.label)
+    print('{:>24s} {:>10d} positions {:>9.2f}s'.format(
+        'one by one', len(leaves), time.perf_counter() - start,
+    ))
+    start = time.perf_counter()
+    batch.flip_counts(
+        batch.positions_array([leaf.board for leaf in leaves], game.height, game.width),
+        [1 if leaf.next_player.label == game.player1.label else -1 for leaf in leaves],
+        game.height,
+        game.width,
+    )
+    print('{:>24s} {:>10d} positions {:>9.2f}s'.format(
+        'batched', len(leaves), time.perf_counter() - start,
+    ))
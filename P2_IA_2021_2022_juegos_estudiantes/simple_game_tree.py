@@ -5,7 +5,7 @@
 """
 from __future__ import annotations  # For Python 3.7
 
-from typing import Any, List, Optional, Tuple
+from typing import Any, Iterable, List, Optional, Tuple
 
 import numpy as np
 
@@ -43,6 +43,11 @@ class SimpleGame(TwoPlayerGame):
         }
         self.player1.label = 'Player 1'
         self.player2.label = 'Player 2'
+        nodes = set(self._successor_lists)
+        for successor_list in self._successor_lists.values():
+            nodes.update(successor_list)
+        # The whole board is a single square holding the current node.
+        self._init_zobrist([0], sorted(nodes))
 
 
     def initialize_board(self) -> str:
@@ -61,18 +66,41 @@ class SimpleGame(TwoPlayerGame):
     ) -> List[TwoPlayerGameState]:
         """Generate the list of successors of a game state."""
         super().generate_successors(state)
-        successors = []
-        if state.board in self._successor_lists:
-            successor_list = self._successor_lists.get(state.board)
-            assert isinstance(successor_list, List)
-            for board_successor in successor_list:
-                move_code = state.board + board_successor
-                successor = state.generate_successor(
-                    board_successor=board_successor,
-                    move_code=move_code,
-                )
-                successors.append(successor)
-        return successors
+        return [self.successor(state, move) for move in self.moves(state)]
+
+    def successor(
+        self,
+        state: TwoPlayerGameState,
+        move: Any,
+    ) -> TwoPlayerGameState:
+        """Successor of a game state for a move (the label of the child node)."""
+        return state.generate_successor(
+            board_successor=move,
+            move_code=self.move_code(state, move),
+        )
+
+    def moves(self, state: TwoPlayerGameState) -> list:
+        """Moves that can be played with make_move."""
+        return self._successor_lists.get(state.board, [])
+
+    def move_code(self, state: TwoPlayerGameState, move: Any) -> Any:
+        """Move code of the successor obtained by playing a move."""
+        return state.board + move
+
+    def _play_in_place(self, state: TwoPlayerGameState, move: Any) -> Any:
+        board = state.board
+        state.move_code = self.move_code(state, move)
+        state.board = move
+        state._zobrist_key = None
+        state._disc_counts = None
+        return board
+
+    def _undo_in_place(self, state: TwoPlayerGameState, board_undo_info: Any) -> None:
+        state.board = board_undo_info
+
+    def occupied_squares(self, board: str) -> Iterable[Tuple[Any, Any]]:
+        """Pairs (square, label) of the pieces on the board."""
+        return [(0, board)]
 
     def score(
         self,
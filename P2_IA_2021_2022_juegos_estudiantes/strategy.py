@@ -8,13 +8,26 @@
 
 from __future__ import annotations  # For Python 3.7
 
+import copy
+import math
+import multiprocessing
+import os
+import random
+import sys
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 
-from game import TwoPlayerGame, TwoPlayerGameState
+import parallel
+from endgame import EndgameSolver
+from game import Deadline, DeadlineExceeded, TwoPlayerGame, TwoPlayerGameState
 from heuristic import Heuristic
+from move_ordering import MoveOrdering
+from opening_book import OpeningBook, initial_pieces, plies_played
+from probcut import ProbCut
+from transposition import (EXACT, LOWER_BOUND, UPPER_BOUND,
+                           TranspositionTable, position_key)
 
 import time
 
@@ -31,15 +44,31 @@ class Strategy(ABC):
         self,
         state: TwoPlayerGameState,
         gui: bool = False,
+        deadline: Optional[Deadline] = None,
     ) -> TwoPlayerGameState:
-        """Compute next move."""
+        """Compute next move.
+
+        deadline, if given, is the time by which the move has to be made.
+        Strategies that search check it while searching.
+        """
+
+    def stop(self) -> None:
+        """Stop any work left in the background, at the end of a match."""
 
     def generate_successors(
         self,
         state: TwoPlayerGameState,
-    ) -> List[TwoPlayerGameState]:
-        """Generate state successors."""
+        lazy: bool = False,
+    ) -> Union[List[TwoPlayerGameState], Iterator[TwoPlayerGameState]]:
+        """Generate state successors.
+
+        With lazy, a generator that creates them one at a time
+        (TwoPlayerGame.iter_successors). It cannot be checked to be
+        non-empty without creating the first successor.
+        """
         assert isinstance(state.game, TwoPlayerGame)
+        if lazy:
+            return state.game.iter_successors(state)
         successors = state.game.generate_successors(state)
         assert successors  # Error if list is empty
         return successors
@@ -52,6 +81,7 @@ class RandomStrategy(Strategy):
         self,
         state: TwoPlayerGameState,
         gui: bool = False,
+        deadline: Optional[Deadline] = None,
     ) -> TwoPlayerGameState:
         """Compute next move."""
         successors = self.generate_successors(state)
@@ -65,6 +95,7 @@ class ManualStrategy(Strategy):
         self,
         state: TwoPlayerGameState,
         gui: bool = False,
+        deadline: Optional[Deadline] = None,
     ) -> TwoPlayerGameState:
         """Compute next move"""
         successors = self.generate_successors(state)
@@ -83,26 +114,451 @@ class ManualStrategy(Strategy):
         return next_state
 
 
-class MinimaxStrategy(Strategy):
-    """Minimax strategy."""
+class BookStrategy(Strategy):
+    """Moves of an opening book, and of another strategy out of the book.
+
+    The book is looked up in the first max_plies plies of the game (all
+    the plies in the book if None).
+    """
+
+    def __init__(
+        self,
+        strategy: Strategy,
+        book: OpeningBook,
+        max_plies: Optional[int] = None,
+        verbose: int = 0,
+    ) -> None:
+        super().__init__(verbose)
+        self.strategy = strategy
+        self.book = book
+        self.max_plies = book.max_plies if max_plies is None else max_plies
+        # Pieces of the initial position of the last game played.
+        self._game: Optional[TwoPlayerGame] = None
+        self._initial_pieces = 0
+
+    def next_move(
+        self,
+        state: TwoPlayerGameState,
+        gui: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TwoPlayerGameState:
+        """Compute next move."""
+        if state.game is not self._game:
+            self._game = state.game
+            self._initial_pieces = initial_pieces(state.game)
+        if plies_played(state, self._initial_pieces) < self.max_plies:
+            successor = self.book.move(state)
+            if successor is not None:
+                if self.verbose > 0:
+                    print('Book move: {}'.format(successor.move_code))
+                return successor
+        return self.strategy.next_move(state, gui, deadline)
+
+    def stop(self) -> None:
+        """Stop the strategy used out of the book."""
+        self.strategy.stop()
+
+
+class PonderingStrategy(Strategy):
+    """Search on the opponent's time (pondering).
+
+    After each move, the reply of the opponent is predicted (the best move
+    stored in the transposition table of the strategy, or else the reply
+    with the lowest heuristic value) and the position after it is
+    searched in a forked process while the opponent thinks, so that the
+    opponent does not compete with it for the interpreter. If the
+    opponent plays the predicted reply (ponder hit), the search goes on
+    for the usual time of a move and its move is played: with iterative
+    deepening (max_seconds_per_move) the move gets the opponent's time
+    plus its own. Otherwise (ponder miss) the search is stopped and the
+    position searched as usual. The tables and trees filled while
+    pondering stay in the forked process.
+
+    While pondering the search is only limited by max_ponder_seconds (or
+    by stop); the deadline is shared with the forked process (see
+    parallel.SharedDeadline). Where processes cannot be forked the
+    strategy does not ponder. Searches with worker processes
+    (workers > 1) cannot ponder.
+    """
+
+    def __init__(
+        self,
+        strategy: Strategy,
+        max_ponder_seconds: Optional[float] = 60,
+        verbose: int = 0,
+    ) -> None:
+        if getattr(strategy, 'workers', 1) > 1:
+            raise ValueError('Pondering needs a search in a single process')
+        super().__init__(verbose)
+        self.strategy = strategy
+        self.max_ponder_seconds = max_ponder_seconds
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        if not parallel.fork_available():
+            print("Pondering needs the 'fork' start method, not pondering", file=sys.stderr)
+        self._process: Optional[multiprocessing.Process] = None
+        self._connection: Any = None
+        self._ponder_state: Optional[TwoPlayerGameState] = None
+        self._ponder_deadline: Optional[Deadline] = None
+
+    def next_move(
+        self,
+        state: TwoPlayerGameState,
+        gui: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TwoPlayerGameState:
+        """Compute next move."""
+        successor = None
+        if self._process is not None:
+            hit = state.zobrist_key == self._ponder_state.zobrist_key
+            successor = self._stop_pondering(state, deadline, hit)
+            if hit:
+                self.ponder_hits += 1
+            else:
+                self.ponder_misses += 1
+            if self.verbose > 0:
+                print('Ponder {}'.format('hit' if hit else 'miss'))
+        if successor is None:
+            successor = self.strategy.next_move(state, gui, deadline)
+        if not successor.end_of_game:
+            self._start_pondering(successor)
+        return successor
+
+    def stop(self) -> None:
+        """Stop pondering (TwoPlayerMatch.play_match calls it at the end)."""
+        if self._process is not None:
+            self._stop_pondering(None, None, False)
+
+    def _predict_reply(self, state: TwoPlayerGameState) -> Optional[TwoPlayerGameState]:
+        """Expected move of the opponent, None if it cannot be predicted."""
+        replies = self.generate_successors(state)
+        transposition_table = getattr(self.strategy, 'transposition_table', None)
+        if transposition_table is not None:
+            entry = transposition_table.lookup(position_key(state))
+            if entry is not None and entry.move is not None:
+                for reply in replies:
+                    if reply.move_code == entry.move:
+                        return reply
+        heuristic = getattr(self.strategy, 'heuristic', None)
+        if heuristic is None:
+            return None
+        # The opponent minimizes the value for the player max (us).
+        return min(replies, key=heuristic.evaluate)
+
+    def _start_pondering(self, state: TwoPlayerGameState) -> None:
+        if not parallel.fork_available():
+            return
+        reply = self._predict_reply(state)
+        if reply is None or reply.end_of_game:
+            return
+        self._ponder_state = reply
+        self._ponder_deadline = parallel.SharedDeadline(self.max_ponder_seconds)
+        context = multiprocessing.get_context('fork')
+        self._connection, child_connection = context.Pipe(duplex=False)
+        self._process = context.Process(
+            target=self._ponder, args=(child_connection,), daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+
+    def _ponder(self, connection: Any) -> None:
+        """Search the pondered position, in the forked process.
+
+        Sends the move code and the value of the move found, or None.
+        """
+        # Iterative deepening until the end of pondering.
+        if getattr(self.strategy, 'max_seconds_per_move', None) is not None:
+            self.strategy.max_seconds_per_move = np.inf
+        try:
+            result = self.strategy.next_move(
+                self._ponder_state, deadline=self._ponder_deadline,
+            )
+            connection.send((result.move_code, getattr(result, 'minimax_value', None)))
+        except DeadlineExceeded:
+            connection.send(None)
+        finally:
+            connection.close()
+
+    def _stop_pondering(
+        self,
+        state: Optional[TwoPlayerGameState],
+        deadline: Optional[Deadline],
+        hit: bool,
+    ) -> Optional[TwoPlayerGameState]:
+        """Wait for the search of the pondered position, and return its move on a hit."""
+        if hit:
+            # The time the move would have been searched for.
+            seconds = getattr(self.strategy, 'max_seconds_per_move', None)
+            if deadline is not None:
+                margin = getattr(self.strategy, 'deadline_margin', 0)
+                seconds = min(
+                    np.inf if seconds is None else seconds,
+                    deadline.remaining() - margin,
+                )
+            if seconds is not None and seconds < self._ponder_deadline.remaining():
+                self._ponder_deadline.reset(max(seconds, 0))
+        else:
+            self._ponder_deadline.reset(0)
+        try:
+            result = self._connection.recv()
+        except EOFError:
+            # The process ended without a result.
+            result = None
+        self._connection.close()
+        self._process.join()
+        self._process = None
+        self._connection = None
+        if not hit or result is None:
+            return None
+        move_code, minimax_value = result
+        # The same move from the state of the match.
+        for successor in self.generate_successors(state):
+            if successor.move_code == move_code:
+                if minimax_value is not None:
+                    successor.minimax_value = minimax_value
+                return successor
+        return None
+
+
+class SearchStrategy(Strategy):
+    """Base class for depth-limited searches guided by a heuristic.
+
+    By default the game tree is searched to max_depth_minimax; if the
+    deadline of the move expires first, DeadlineExceeded is raised and
+    the move is lost. When max_seconds_per_move is given, the search is
+    iterative deepening: depths 1, 2, ..., max_depth_minimax are searched
+    while there is time left (within the budget and before the deadline),
+    and the best move of the last completed depth is played. The best
+    move of each iteration is tried first in the next one.
+
+    With in_place, the successors of the root are generated as usual,
+    but the rest of the tree is searched by playing and taking back moves
+    on the board of each of them (TwoPlayerGame.make_move/unmake_move),
+    without creating states or copying boards.
+
+    With lazy, the search goes through the moves of each node below the
+    root (TwoPlayerGame.moves, in generation order, or in the order of
+    the move ordering if there is one) and creates the successor of a
+    move (TwoPlayerGame.successor) only when it is searched: after a
+    cut-off, the remaining successors are never created.
+
+    With an endgame_solver, the positions below the root that it can
+    solve (e.g. Reversi with few empty squares) are given their exact
+    value instead of being searched.
+    """
+
+    # Nodes visited between two checks of the clock.
+    time_check_interval = 32
+    # Seconds kept in reserve to return the move before the deadline.
+    deadline_margin = 0.05
 
     def __init__(
         self,
         heuristic: Heuristic,
         max_depth_minimax: int,
         verbose: int = 0,
+        max_seconds_per_move: Optional[float] = None,
+        in_place: bool = False,
+        endgame_solver: Optional[EndgameSolver] = None,
+        lazy: bool = False,
     ) -> None:
+        if in_place and lazy:
+            raise ValueError('Use either moves in place or lazy successors')
         super().__init__(verbose)
         self.heuristic = heuristic
         self.max_depth_minimax = max_depth_minimax
+        self.max_seconds_per_move = max_seconds_per_move
+        self.in_place = in_place
+        self.lazy = lazy
+        self.endgame_solver = endgame_solver
+        self._undo_stack: list = []
+        self._root_depth = 0
+        # Statistics of the last search.
+        self.nodes_visited = 0
+        self.depth_reached = 0
+        self._deadline: Optional[Deadline] = None
+        self._depth_cutoff = False
+        # Best move of the last completed iteration of iterative deepening,
+        # and values of all the completed iterations.
+        self._previous_best_move: Any = None
+        self._iteration_values: List[float] = []
+
+    def _search(
+        self,
+        state: TwoPlayerGameState,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Search to a fixed depth or within the time budget."""
+        self.nodes_visited = 0
+        self._previous_best_move = None
+        self._iteration_values = []
+        if self.endgame_solver is not None:
+            self.endgame_solver.reset_stats()
+        if self.max_seconds_per_move is None:
+            self._deadline = deadline
+            self.depth_reached = self.max_depth_minimax
+            # The root always gets successor states, to return one of them.
+            successors = self.generate_successors(state) if self.in_place else None
+            try:
+                return self._search_root(state, self.max_depth_minimax, successors)
+            finally:
+                self._deadline = None
+        return self._iterative_deepening(state, deadline)
+
+    def _iterative_deepening(
+        self,
+        state: TwoPlayerGameState,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Deepen the search until the time budget runs out."""
+        seconds = self.max_seconds_per_move
+        if deadline is not None:
+            seconds = min(seconds, deadline.remaining() - self.deadline_margin)
+        self._deadline = Deadline(seconds, parent=deadline)
+        successors = list(self.generate_successors(state))
+        minimax_value, minimax_successor = None, successors[0]
+        self.depth_reached = 0
+        try:
+            for depth in range(1, self.max_depth_minimax + 1):
+                self._depth_cutoff = False
+                value, successor = self._search_root(state, depth, successors)
+                minimax_value, minimax_successor = value, successor
+                self.depth_reached = depth
+                if self.verbose > 0:
+                    print('Depth {:d}: value = {:.2g}, move {}'.format(
+                        depth, value, successor.move_code,
+                    ))
+                # Best move first in the next iteration.
+                successors.remove(successor)
+                successors.insert(0, successor)
+                self._previous_best_move = successor.move_code
+                self._iteration_values.append(value)
+                if not self._depth_cutoff:
+                    break  # The whole game tree has been searched.
+        except DeadlineExceeded:
+            pass
+        finally:
+            self._deadline = None
+
+        if minimax_value is None:
+            # Not even depth 1 was completed: play the first move.
+            minimax_value = self.heuristic.evaluate(minimax_successor)
+
+        return minimax_value, minimax_successor
+
+    def _visit_node(self) -> None:
+        """Count a node, check the clock every time_check_interval nodes."""
+        self.nodes_visited += 1
+        if (
+            self._deadline is not None
+            and self.nodes_visited % self.time_check_interval == 0
+        ):
+            self._deadline.check()
+
+    def _children(
+        self,
+        state: TwoPlayerGameState,
+        successors: Optional[List[TwoPlayerGameState]] = None,
+    ) -> list:
+        """Successor states, or moves when searching in place or lazily."""
+        if successors is not None:
+            return successors
+        if self.in_place or self.lazy:
+            return state.game.moves(state)
+        return self.generate_successors(state)
 
-    def next_move(self, state: TwoPlayerGameState, gui: bool = False,) -> TwoPlayerGameState:
+    def _make_child(self, state: TwoPlayerGameState, child: Any) -> TwoPlayerGameState:
+        """State to search for a child given by _children."""
+        if isinstance(child, TwoPlayerGameState):
+            self._undo_stack.append(None)
+            return child
+        if self.lazy:
+            self._undo_stack.append(None)
+            return state.game.successor(state, child)
+        self._undo_stack.append(state.game.make_move(state, child))
+        return state
+
+    def _unmake_child(self, state: TwoPlayerGameState) -> None:
+        """Take back the last _make_child."""
+        undo_info = self._undo_stack.pop()
+        if undo_info is not None:
+            state.game.unmake_move(state, undo_info)
+
+    def _endgame_value(self, state: TwoPlayerGameState, depth: int) -> Optional[float]:
+        """Exact value of a state below the root, None if it cannot be solved."""
+        if (
+            self.endgame_solver is None
+            or depth == self._root_depth
+            or not self.endgame_solver.applies(state)
+        ):
+            return None
+        return self.endgame_solver.value(state, self._deadline)
+
+    def _print_endgame_stats(self) -> None:
+        if self.verbose > 0 and self.endgame_solver is not None:
+            stats = self.endgame_solver.stats()
+            if stats['solved']:
+                print('Endgame solver: {} positions, {} nodes, {:.0f} nodes per second'.format(
+                    stats['solved'], stats['nodes'], stats['nodes_per_second'],
+                ))
+
+    def _evaluate_leaf(self, state: TwoPlayerGameState) -> float:
+        """Heuristic value of a terminal state or of the depth cut-off."""
+        if not state.end_of_game:
+            self._depth_cutoff = True
+        return self.heuristic.evaluate(state)
+
+    def _leaf_group_values(self, children: list) -> Optional[np.ndarray]:
+        """Heuristic values of the children of a node at depth 1, in one call.
+
+        None if they have to be evaluated one by one: the heuristic has no
+        batched evaluation, the children are moves (in place) or the
+        endgame solver applies to some of them.
+        """
+        if (
+            self.heuristic.batch_evaluation_function is None
+            or not children
+            or not isinstance(children[0], TwoPlayerGameState)
+            or (
+                self.endgame_solver is not None
+                and any(self.endgame_solver.applies(child) for child in children)
+            )
+        ):
+            return None
+        if not all(child.end_of_game for child in children):
+            self._depth_cutoff = True
+        return self.heuristic.evaluate_batch(children)
+
+    @abstractmethod
+    def _search_root(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        successors: Optional[List[TwoPlayerGameState]],
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Search the state to a given depth.
+
+        successors, if given, are the successors of the root in the
+        order in which they have to be searched.
+        """
+
+
+class MinimaxStrategy(SearchStrategy):
+    """Minimax strategy.
+
+    With a batched heuristic (Heuristic.batch_evaluation_function), the
+    leaves that are children of the same node are evaluated together.
+    """
+
+    def next_move(
+        self,
+        state: TwoPlayerGameState,
+        gui: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TwoPlayerGameState:
         """Compute the next state in the game."""
 
-        minimax_value, minimax_successor = self._max_value(
-            state,
-            self.max_depth_minimax,
-        )
+        minimax_value, minimax_successor = self._search(state, deadline)
 
         if self.verbose > 0:
             if self.verbose > 1:
@@ -110,12 +566,23 @@ class MinimaxStrategy(Strategy):
                 print(state.board)
                 print()
             print('Minimax value = {:.2g}'.format(minimax_value))
+        self._print_endgame_stats()
 
         if minimax_successor:
             minimax_successor.minimax_value = minimax_value
 
         return minimax_successor
 
+    def _search_root(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        successors: Optional[List[TwoPlayerGameState]],
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Search the state to a given depth."""
+        self._root_depth = depth
+        return self._max_value(state, depth, successors)
+
     def _min_value(
         self,
         state: TwoPlayerGameState,
@@ -123,19 +590,34 @@ class MinimaxStrategy(Strategy):
     ) -> float:
         """Min step of the minimax algorithm."""
 
+        self._visit_node()
+        value = self._endgame_value(state, depth)
+        if value is not None:
+            return value, None
+        minimax_successor = None
         if state.end_of_game or depth == 0:
-            minimax_value = self.heuristic.evaluate(state)
-            minimax_successor = None
+            minimax_value = self._evaluate_leaf(state)
         else:
             minimax_value = np.inf
 
-            for successor in self.generate_successors(state):
+            children = self._children(state)
+            leaf_values = self._leaf_group_values(children) if depth == 1 else None
+            for child_number, child in enumerate(children):
                 if self.verbose > 1:
                     print('{}: {}'.format(state.board, minimax_value))
 
-                successor_minimax_value, _ = self._max_value(
-                    successor,
-                    depth - 1)
+                if leaf_values is not None:
+                    self._visit_node()
+                    successor = child
+                    successor_minimax_value = leaf_values[child_number]
+                else:
+                    successor = self._make_child(state, child)
+                    try:
+                        successor_minimax_value, _ = self._max_value(
+                            successor,
+                            depth - 1)
+                    finally:
+                        self._unmake_child(state)
 
                 if (successor_minimax_value < minimax_value):
                     minimax_value = successor_minimax_value
@@ -150,23 +632,39 @@ class MinimaxStrategy(Strategy):
         self,
         state: TwoPlayerGameState,
         depth: int,
+        successors: Optional[List[TwoPlayerGameState]] = None,
     ) -> float:
         """Max step of the minimax algorithm."""
 
+        self._visit_node()
+        value = self._endgame_value(state, depth)
+        if value is not None:
+            return value, None
+        minimax_successor = None
         if state.end_of_game or depth == 0:
-            minimax_value = self.heuristic.evaluate(state)
-            minimax_successor = None
+            minimax_value = self._evaluate_leaf(state)
         else:
             minimax_value = -np.inf
 
-            for successor in self.generate_successors(state):
+            children = self._children(state, successors)
+            leaf_values = self._leaf_group_values(children) if depth == 1 else None
+            for child_number, child in enumerate(children):
                 if self.verbose > 1:
                     print('{}: {}'.format(state.board, minimax_value))
 
-                successor_minimax_value, _ = self._min_value(
-                    successor,
-                    depth - 1,
-                )
+                if leaf_values is not None:
+                    self._visit_node()
+                    successor = child
+                    successor_minimax_value = leaf_values[child_number]
+                else:
+                    successor = self._make_child(state, child)
+                    try:
+                        successor_minimax_value, _ = self._min_value(
+                            successor,
+                            depth - 1,
+                        )
+                    finally:
+                        self._unmake_child(state)
                 if (successor_minimax_value > minimax_value):
                     minimax_value = successor_minimax_value
                     minimax_successor = successor
@@ -177,76 +675,1261 @@ class MinimaxStrategy(Strategy):
         return minimax_value, minimax_successor
 
 
-class MinimaxAlphaBetaStrategy(Strategy):
-    """Minimax alpha-beta strategy."""
+class MinimaxAlphaBetaStrategy(SearchStrategy):
+    """Minimax alpha-beta strategy.
 
-    def __init__(self, heuristic: Heuristic, max_depth_minimax: int, verbose: int = 0) -> None:
-        super().__init__(verbose)
-        self.heuristic = heuristic
-        self.max_depth_minimax = max_depth_minimax
+    By default the root is searched with the full window. Two other
+    drivers search it with narrower windows, which prune more:
+
+    - aspiration_window: each iteration of iterative deepening after the
+      first searches [v - w, v + w], v being the value of the previous
+      iteration and w the aspiration_window. If the value falls outside,
+      the window is widened on that side (w doubled) and searched again.
+    - mtdf: MTD(f) converges to the value by null window searches, from
+      the value of the previous iteration or else the heuristic value of
+      the root. It needs the transposition table, which keeps the results
+      of one search for the next.
 
-    def next_move(self, state: TwoPlayerGameState, gui: bool = False) -> TwoPlayerGameState:
+    With workers > 1, the root is searched in parallel (young brothers
+    wait): its first successor is searched first, and the others then
+    in worker processes, with a shared lower bound on the value of the
+    root. The move is the one of the serial search at the same depth,
+    the first successor with the largest value (except when a
+    transposition table returns values of deeper searches, which depend
+    on the order of the search).
+
+    With quiescence_depth > 0, the positions at the depth cut-off are not
+    evaluated directly: their tactical moves (TwoPlayerGame.tactical_moves,
+    e.g. corner fights in Reversi) are searched up to quiescence_depth
+    plies further, so that the heuristic is applied to quiet positions.
+
+    Two options search less than the full tree, at some risk of missing
+    the best move:
+
+    - late_move_reduction: below the root, the successors after the
+      first late_move_reduction ones (with a good move ordering, the
+      unlikely to be best) are searched reduced_depth plies less deep,
+      and searched again to the full depth if their value improves the
+      window.
+    - probcut: nodes at probcut.depth are cut off when a shallow search
+      predicts that the full search would fail high or low (see
+      ProbCut). The prediction has to be fitted first with
+      calibrate_probcut.
+    """
+
+    # Failed aspiration searches before opening the window completely.
+    max_aspiration_failures = 3
+    # Plies less searched by late move reductions, and minimum depth
+    # left at which moves are reduced.
+    reduced_depth = 1
+    min_reduction_depth = 3
+
+    def __init__(
+        self,
+        heuristic: Heuristic,
+        max_depth_minimax: int,
+        verbose: int = 0,
+        transposition_table: Optional[TranspositionTable] = None,
+        persistent_table: bool = False,
+        max_seconds_per_move: Optional[float] = None,
+        in_place: bool = False,
+        move_ordering: Optional[MoveOrdering] = None,
+        aspiration_window: Optional[float] = None,
+        mtdf: bool = False,
+        workers: int = 1,
+        endgame_solver: Optional[EndgameSolver] = None,
+        quiescence_depth: int = 0,
+        late_move_reduction: int = 0,
+        probcut: Optional[ProbCut] = None,
+        lazy: bool = False,
+    ) -> None:
+        if quiescence_depth < 0:
+            raise ValueError('The quiescence depth cannot be negative')
+        if late_move_reduction < 0:
+            raise ValueError('The number of moves searched to full depth cannot be negative')
+        if workers > 1 and (mtdf or aspiration_window is not None):
+            raise ValueError('Parallel searches use the full window at the root')
+        if mtdf and transposition_table is None:
+            raise ValueError('MTD(f) needs a transposition table')
+        if mtdf and aspiration_window is not None:
+            raise ValueError('Use either MTD(f) or aspiration windows')
+        if aspiration_window is not None and aspiration_window <= 0:
+            raise ValueError('The aspiration window has to be positive')
+        super().__init__(
+            heuristic,
+            max_depth_minimax,
+            verbose,
+            max_seconds_per_move,
+            in_place,
+            endgame_solver,
+            lazy,
+        )
+        # Results of earlier searches, None to disable.
+        self.transposition_table = transposition_table
+        # Keep the table between calls to next_move.
+        self.persistent_table = persistent_table
+        # Order of the successors of each node, None for generation order.
+        self.move_ordering = move_ordering
+        self.aspiration_window = aspiration_window
+        self.mtdf = mtdf
+        self.workers = workers
+        self.quiescence_depth = quiescence_depth
+        # Moves searched to full depth before reducing, 0 to disable.
+        self.late_move_reduction = late_move_reduction
+        self.probcut = probcut
+        self._parallel_root: Optional[_ParallelRoot] = None
+        # Statistics of late move reductions in the last search.
+        self.reductions = 0
+        self.re_searches = 0
+
+    def next_move(
+        self,
+        state: TwoPlayerGameState,
+        gui: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TwoPlayerGameState:
         """Compute the next state in the game."""
-        alpha = -np.inf
-        beta = np.inf
-        minimax_value, minimax_successor = self._max_value(state, self.max_depth_minimax, alpha=alpha, beta=beta)
+        if self.transposition_table is not None:
+            if not self.persistent_table:
+                self.transposition_table.clear()
+            self.transposition_table.new_search()
+            self.transposition_table.reset_stats()
+        if self.move_ordering is not None:
+            self.move_ordering.new_search()
+            self.move_ordering.reset_stats()
+        if self.probcut is not None:
+            self.probcut.reset_stats()
+        self.reductions = 0
+        self.re_searches = 0
+
+        if self.workers > 1:
+            minimax_value, minimax_successor = self._parallel_search(state, deadline)
+        else:
+            minimax_value, minimax_successor = self._search(state, deadline)
 
         if self.verbose > 1:
-            print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
+            print(f"{state.board}: {minimax_value}")
+        if self.verbose > 0 and self.transposition_table is not None:
+            print('Transposition table: {}'.format(self.transposition_table.stats()))
+        if self.verbose > 0 and self.move_ordering is not None:
+            print('Move ordering: {}'.format(self.move_ordering.stats()))
+        if self.verbose > 0 and self.late_move_reduction:
+            print('Late move reductions: {} reduced, {} searched again'.format(
+                self.reductions, self.re_searches,
+            ))
+        if self.verbose > 0 and self.probcut is not None:
+            print('ProbCut: {}'.format(self.probcut.stats()))
+        self._print_endgame_stats()
         if minimax_successor:
             minimax_successor.minimax_value = minimax_value
 
         return minimax_successor
 
+    def _search_root(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        successors: Optional[List[TwoPlayerGameState]],
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Search the state to a given depth."""
+        self._root_depth = depth
+        if self._parallel_root is not None:
+            return self._parallel_search_root(state, depth, successors)
+        if self.mtdf:
+            return self._mtdf(state, depth, successors)
+        if self.aspiration_window is not None and self._iteration_values:
+            return self._aspiration_search(state, depth, successors)
+        return self._search_window(state, depth, -np.inf, np.inf, successors)
+
+    def _parallel_search(
+        self,
+        state: TwoPlayerGameState,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Search with a pool of worker processes for the whole move."""
+        # The workers are forked when the first task is submitted, after
+        # the first successor has been searched: they inherit the
+        # successors of the root, the bound and the deadline.
+        parallel_root = _ParallelRoot(self.generate_successors(state))
+        with parallel.forked_pool(self.workers, self) as executor:
+            if executor is None:
+                return self._search(state, deadline)
+            parallel_root.executor = executor
+            parallel_root.bound = multiprocessing.get_context('fork').Value('d', -np.inf)
+            self._parallel_root = parallel_root
+            try:
+                return self._search(state, deadline)
+            finally:
+                self._parallel_root = None
+
+    def _parallel_search_root(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        successors: Optional[List[TwoPlayerGameState]],
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Search the first successor, then the others in parallel."""
+        parallel_root = self._parallel_root
+        self._visit_node()
+        tt_move = None
+        if self.transposition_table is not None:
+            key, _, _, _, tt_move = self._probe(state, depth, -np.inf, np.inf)
+        if successors is None:
+            successors = parallel_root.successors
+        children, _ = self._ordered_children(state, depth, successors, tt_move)
+        indices = [parallel_root.index(child.move_code) for child in children]
+
+        # The eldest brother, searched alone.
+        successor = self._make_child(state, children[0])
+        try:
+            minimax_value, _ = self._min_value(successor, depth - 1, -np.inf, np.inf)
+        finally:
+            self._unmake_child(state)
+        minimax_successor = children[0]
+        parallel_root.bound.value = minimax_value
+
+        # The younger brothers, in parallel.
+        futures = [
+            parallel_root.executor.submit(_alpha_beta_root_worker, index, depth)
+            for index in indices[1:]
+        ]
+        try:
+            for child, future in zip(children[1:], futures):
+                successor_minimax_value, nodes_visited, depth_cutoff = future.result()
+                self.nodes_visited += nodes_visited
+                self._depth_cutoff |= depth_cutoff
+                # Strictly greater: among equal values, the first successor.
+                if successor_minimax_value > minimax_value:
+                    minimax_value = successor_minimax_value
+                    minimax_successor = child
+        finally:
+            for future in futures:
+                future.cancel()
+
+        if self.transposition_table is not None:
+            self._store(key, depth, minimax_value, -np.inf, np.inf, minimax_successor.move_code)
+
+        return minimax_value, minimax_successor
+
+    def _search_window(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        alpha: float,
+        beta: float,
+        successors: Optional[List[TwoPlayerGameState]],
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Search the root with the window [alpha, beta]."""
+        minimax_value, minimax_successor = self._max_value(
+            state, depth, alpha, beta, successors,
+        )
+
+        if minimax_successor is None and not state.end_of_game:
+            # The value of the root came from the transposition table.
+            minimax_successor = self._successor_from_table(state, successors)
+
+        return minimax_value, minimax_successor
+
+    def _first_guess(self) -> Optional[float]:
+        """Guess of the value of the root from the previous iterations.
+
+        The value two iterations back is preferred: heuristics often
+        favour the player who moved last, so values oscillate between odd
+        and even depths.
+        """
+        if not self._iteration_values:
+            return None
+        return self._iteration_values[-2 if len(self._iteration_values) > 1 else -1]
+
+    def _aspiration_search(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        successors: Optional[List[TwoPlayerGameState]],
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """Search windows around the value of the previous iteration."""
+        lower_width = upper_width = self.aspiration_window
+        failures = 0
+        while True:
+            if failures >= self.max_aspiration_failures:
+                lower_width = upper_width = np.inf
+            alpha = self._first_guess() - lower_width
+            beta = self._first_guess() + upper_width
+            minimax_value, minimax_successor = self._search_window(
+                state, depth, alpha, beta, successors,
+            )
+            if minimax_value <= alpha and alpha > -np.inf:
+                lower_width *= 2
+            elif minimax_value >= beta and beta < np.inf:
+                upper_width *= 2
+            else:
+                return minimax_value, minimax_successor
+            failures += 1
+            if self.verbose > 0:
+                print('Aspiration window [{:.2g}, {:.2g}] failed'.format(alpha, beta))
+
+    def _mtdf(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        successors: Optional[List[TwoPlayerGameState]],
+    ) -> Tuple[float, Optional[TwoPlayerGameState]]:
+        """MTD(f): bound the value with null window searches until it is found."""
+        guess = self._first_guess()
+        if guess is None:
+            guess = self.heuristic.evaluate(state)
+        lower, upper = -np.inf, np.inf
+        minimax_successor = None
+        while lower < upper:
+            # Null window (beta - ulp, beta): is the value at least beta?
+            beta = np.nextafter(guess, np.inf) if guess == lower else guess
+            guess, successor = self._max_value(
+                state, depth, np.nextafter(beta, -np.inf), beta, successors,
+            )
+            if guess < beta:
+                upper = guess
+            else:
+                lower = guess
+                # A move worth at least the value.
+                minimax_successor = successor
+
+        if minimax_successor is None and not state.end_of_game:
+            minimax_successor = self._successor_from_table(state, successors)
+
+        return guess, minimax_successor
+
+    def _successor_from_table(
+        self,
+        state: TwoPlayerGameState,
+        successors: Optional[List[TwoPlayerGameState]] = None,
+    ) -> TwoPlayerGameState:
+        """Successor for the best move stored in the transposition table."""
+        entry = self.transposition_table.lookup(position_key(state))
+        if successors is None:
+            successors = self.generate_successors(state)
+        for successor in successors:
+            if entry is not None and successor.move_code == entry.move:
+                return successor
+        return successors[0]
+
+    def _probe(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        alpha: float,
+        beta: float,
+    ) -> Tuple[Any, Optional[float], float, float, Any]:
+        """Look the state up in the transposition table.
+
+        Returns the key of the state, the stored value if it settles the
+        search (None otherwise), the window narrowed by stored bounds and
+        the stored best move (None if there is none).
+        """
+        key = position_key(state)
+        entry = self.transposition_table.lookup(key)
+        if entry is None:
+            return key, None, alpha, beta, None
+        if entry.depth < depth:
+            # Too shallow for its value, but its move is still a good guess.
+            return key, None, alpha, beta, entry.move
+        # The stored result may hide depth cut-offs.
+        self._depth_cutoff = True
+        if entry.flag == EXACT:
+            return key, entry.value, alpha, beta, entry.move
+        if entry.flag == LOWER_BOUND:
+            alpha = max(alpha, entry.value)
+        else:
+            beta = min(beta, entry.value)
+        if beta <= alpha:
+            return key, entry.value, alpha, beta, entry.move
+        return key, None, alpha, beta, entry.move
+
+    def calibrate_probcut(self, positions: List[TwoPlayerGameState]) -> None:
+        """Fit the model of probcut to values found by this strategy.
+
+        Each position is searched for each player, as a max node and as
+        a min node, to probcut.shallow_depth and to probcut.depth, with
+        the heuristic of the strategy and without forward pruning.
+        """
+        if self.probcut is None:
+            raise ValueError('The strategy has no ProbCut to calibrate')
+        plain = MinimaxAlphaBetaStrategy(
+            self.heuristic,
+            self.probcut.depth,
+            in_place=self.in_place,
+            quiescence_depth=self.quiescence_depth,
+            lazy=self.lazy,
+        )
+        samples = []
+        for position in positions:
+            for is_max in (True, False):
+                state = position.clone()
+                state.player_max = (
+                    state.next_player if is_max
+                    else state.game.opponent(state.next_player)
+                )
+                search = plain._max_value if is_max else plain._min_value
+                values = []
+                for depth in (self.probcut.shallow_depth, self.probcut.depth):
+                    plain._root_depth = depth
+                    value, _ = search(state, depth, -np.inf, np.inf)
+                    values.append(value)
+                samples.append((is_max, values[0], values[1]))
+        self.probcut.fit(samples)
+
+    def _probcut(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        alpha: float,
+        beta: float,
+        is_max: bool,
+    ) -> Optional[float]:
+        """Bound returned by ProbCut for a node, None if it is not cut off."""
+        probcut = self.probcut
+        if (
+            probcut is None
+            or depth != probcut.depth
+            or depth == self._root_depth
+            or state.end_of_game
+        ):
+            return None
+        low, high = probcut.bounds(is_max, alpha, beta)
+        search = self._max_value if is_max else self._min_value
+        if high is not None:
+            # Null window: is the shallow value at least high?
+            probcut.tries += 1
+            value, _ = search(state, probcut.shallow_depth, np.nextafter(high, -np.inf), high)
+            if value >= high:
+                probcut.cuts += 1
+                return beta
+        if low is not None:
+            probcut.tries += 1
+            value, _ = search(state, probcut.shallow_depth, low, np.nextafter(low, np.inf))
+            if value <= low:
+                probcut.cuts += 1
+                return alpha
+        return None
+
+    def _child_value(
+        self,
+        successor: TwoPlayerGameState,
+        depth: int,
+        alpha: float,
+        beta: float,
+        move_number: int,
+        is_max: bool,
+    ) -> float:
+        """Value of the successor of a node at depth, a max node or not.
+
+        Late moves are searched less deep first (late move reductions).
+        """
+        search = self._min_value if is_max else self._max_value
+        if (
+            self.late_move_reduction
+            and move_number >= self.late_move_reduction
+            and self.min_reduction_depth <= depth < self._root_depth
+        ):
+            self.reductions += 1
+            value, _ = search(successor, depth - 1 - self.reduced_depth, alpha, beta)
+            if (value <= alpha) if is_max else (value >= beta):
+                return value
+            # The late move may be better than expected.
+            self.re_searches += 1
+        value, _ = search(successor, depth - 1, alpha, beta)
+        return value
+
+    def _leaf_value(
+        self,
+        state: TwoPlayerGameState,
+        alpha: float,
+        beta: float,
+        is_max: bool,
+    ) -> float:
+        """Value of a terminal state or of the depth cut-off."""
+        if state.end_of_game or self.quiescence_depth == 0:
+            return self._evaluate_leaf(state)
+        return self._quiescence(state, self.quiescence_depth, alpha, beta, is_max)
+
+    def _quiescence(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        alpha: float,
+        beta: float,
+        is_max: bool,
+    ) -> float:
+        """Search only the tactical moves of the game, to a given depth.
+
+        The heuristic value of the state (stand pat) is a bound for the
+        player to move, who is assumed to have a quiet move at least as
+        good as not playing a tactical one.
+        """
+        stand_pat = self._evaluate_leaf(state)
+        if depth == 0 or state.end_of_game:
+            return stand_pat
+        if is_max:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+
+        value = stand_pat
+        for child in self._tactical_children(state):
+            self._visit_node()
+            successor = self._make_child(state, child)
+            try:
+                successor_value = self._quiescence(successor, depth - 1, alpha, beta, not is_max)
+            finally:
+                self._unmake_child(state)
+            if is_max:
+                value = max(value, successor_value)
+                alpha = max(alpha, value)
+            else:
+                value = min(value, successor_value)
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
+        return value
+
+    def _tactical_children(self, state: TwoPlayerGameState) -> list:
+        """Children (as in _children) for the tactical moves of a state."""
+        moves = state.game.tactical_moves(state)
+        if self.in_place or self.lazy or not moves:
+            return moves
+        move_codes = {state.game.move_code(state, move) for move in moves}
+        return [
+            successor for successor in self.generate_successors(state)
+            if successor.move_code in move_codes
+        ]
+
+    def _ordered_children(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        successors: Optional[List[TwoPlayerGameState]],
+        tt_move: Any,
+    ) -> Tuple[list, Optional[list]]:
+        """Children of a state in search order, and their move codes.
+
+        The move codes are None when there is no move ordering.
+        """
+        children = self._children(state, successors)
+        if self.move_ordering is None:
+            return children, None
+        ply = self._root_depth - depth
+        if tt_move is None and ply == 0:
+            tt_move = self._previous_best_move
+        move_codes = [
+            child.move_code if isinstance(child, TwoPlayerGameState)
+            else state.game.move_code(state, child)
+            for child in children
+        ]
+        return self.move_ordering.order(state, children, move_codes, ply, tt_move)
+
+    def _record_cutoff(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        move_codes: Optional[list],
+        move_number: int,
+    ) -> None:
+        """Tell the move ordering which move caused a cut-off."""
+        if move_codes is not None:
+            self.move_ordering.record_cutoff(
+                state,
+                move_codes[move_number],
+                self._root_depth - depth,
+                depth,
+                move_number,
+            )
+
+    def _store(
+        self,
+        key: Any,
+        depth: int,
+        value: float,
+        alpha: float,
+        beta: float,
+        move: Any,
+    ) -> None:
+        """Store the value of a state searched with window [alpha, beta]."""
+        if value <= alpha:
+            flag = UPPER_BOUND
+        elif value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.transposition_table.store(key, depth, value, flag, move)
+
     def _min_value(self,state: TwoPlayerGameState,depth: int, alpha: float, beta: float) -> float:
         """Min step of the minimax algorithm with updating alpha and beta."""
 
+        self._visit_node()
+        value = self._endgame_value(state, depth)
+        if value is not None:
+            return value, None
+        tt_move = None
+        if self.transposition_table is not None:
+            alpha_original, beta_original = alpha, beta
+            key, value, alpha, beta, tt_move = self._probe(state, depth, alpha, beta)
+            if value is not None:
+                return value, None
+
+        value = self._probcut(state, depth, alpha, beta, False)
+        if value is not None:
+            return value, None
+
+        minimax_successor = None
+        best_move = None
         if state.end_of_game or depth == 0:
-            minimax_value = self.heuristic.evaluate(state)
-            minimax_successor = None
+            minimax_value = self._leaf_value(state, alpha, beta, False)
         else:
             minimax_value = np.inf
 
-            for successor in self.generate_successors(state):
+            children, move_codes = self._ordered_children(state, depth, None, tt_move)
+            for move_number, child in enumerate(children):
                 if self.verbose > 1:
                     print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
 
-                successor_minimax_value, _ = self._max_value(successor, depth - 1, alpha, beta)
-                if successor_minimax_value < minimax_value:
-                    minimax_value = successor_minimax_value
-                    minimax_successor = successor
+                successor = self._make_child(state, child)
+                try:
+                    successor_minimax_value = self._child_value(
+                        successor, depth, alpha, beta, move_number, False,
+                    )
+                    if successor_minimax_value < minimax_value:
+                        minimax_value = successor_minimax_value
+                        minimax_successor = successor
+                        best_move = successor.move_code
+                finally:
+                    self._unmake_child(state)
                 beta = min(beta, minimax_value)
                 if beta <= alpha:
-                    return minimax_value, minimax_successor
+                    self._record_cutoff(state, depth, move_codes, move_number)
+                    break
 
         if self.verbose > 1:
             print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
 
+        if self.transposition_table is not None:
+            self._store(key, depth, minimax_value, alpha_original, beta_original, best_move)
+
         return minimax_value, minimax_successor
 
-    def _max_value(self, state: TwoPlayerGameState, depth: int, alpha: float, beta: float) -> float:
+    def _max_value(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        alpha: float,
+        beta: float,
+        successors: Optional[List[TwoPlayerGameState]] = None,
+    ) -> float:
         """Max step of the minimax algorithm with update of alpha and beta."""
 
+        self._visit_node()
+        value = self._endgame_value(state, depth)
+        if value is not None:
+            return value, None
+        tt_move = None
+        if self.transposition_table is not None:
+            alpha_original, beta_original = alpha, beta
+            key, value, alpha, beta, tt_move = self._probe(state, depth, alpha, beta)
+            if value is not None:
+                return value, None
+
+        value = self._probcut(state, depth, alpha, beta, True)
+        if value is not None:
+            return value, None
+
+        minimax_successor = None
+        best_move = None
         if state.end_of_game or depth == 0:
-            minimax_value = self.heuristic.evaluate(state)
-            minimax_successor = None
+            minimax_value = self._leaf_value(state, alpha, beta, True)
         else:
             minimax_value = -np.inf
-            for successor in self.generate_successors(state):
+            children, move_codes = self._ordered_children(state, depth, successors, tt_move)
+            for move_number, child in enumerate(children):
                 if self.verbose > 1:
                     print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
 
-                successor_minimax_value, _ = self._min_value(successor, depth - 1, alpha, beta)
-                if (successor_minimax_value > minimax_value):
-                    minimax_value = successor_minimax_value
-                    minimax_successor = successor
+                successor = self._make_child(state, child)
+                try:
+                    successor_minimax_value = self._child_value(
+                        successor, depth, alpha, beta, move_number, True,
+                    )
+                    if (successor_minimax_value > minimax_value):
+                        minimax_value = successor_minimax_value
+                        minimax_successor = successor
+                        best_move = successor.move_code
+                finally:
+                    self._unmake_child(state)
 
                 alpha = max(alpha, minimax_value)
                 if beta <= alpha:
-                    return minimax_value, minimax_successor
+                    self._record_cutoff(state, depth, move_codes, move_number)
+                    break
 
         if self.verbose > 1:
             print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
 
+        if self.transposition_table is not None:
+            self._store(key, depth, minimax_value, alpha_original, beta_original, best_move)
+
         return minimax_value, minimax_successor
 
+
+class _ParallelRoot(object):
+    """Root of a parallel alpha-beta search, shared with the workers."""
+
+    def __init__(self, successors: List[TwoPlayerGameState]) -> None:
+        self.successors = successors
+        self._indices = {
+            successor.move_code: index
+            for index, successor in enumerate(successors)
+        }
+        self.executor = None
+        # Largest value of the successors searched so far.
+        self.bound = None
+
+    def index(self, move_code: Any) -> int:
+        """Index of the successor of a move."""
+        return self._indices[move_code]
+
+
+def _alpha_beta_root_worker(index: int, depth: int) -> Tuple[float, int, bool]:
+    """Search a successor of the root of a parallel search in a worker.
+
+    The successor is searched with the window (bound - ulp, inf): its value
+    is exact if it is not below the bound, the largest value found so far.
+    Returns the value, the nodes visited and whether there were depth
+    cut-offs.
+    """
+    strategy = parallel.shared()
+    parallel_root = strategy._parallel_root
+    strategy.nodes_visited = 0
+    strategy._depth_cutoff = False
+    strategy._root_depth = depth
+    alpha = np.nextafter(parallel_root.bound.value, -np.inf)
+    value, _ = strategy._min_value(
+        parallel_root.successors[index], depth - 1, alpha, np.inf,
+    )
+    with parallel_root.bound.get_lock():
+        if value > parallel_root.bound.value:
+            parallel_root.bound.value = value
+    return value, strategy.nodes_visited, strategy._depth_cutoff
+
+
+class PVSStrategy(MinimaxAlphaBetaStrategy):
+    """Principal variation search (NegaScout).
+
+    The first successor of each node, which the move ordering expects to
+    be the best, is searched with the full window. The others are only
+    tested with a null window, to prove that they are not better, and
+    are searched again with the full window when the test fails. The
+    better the move ordering, the fewer nodes are searched twice.
+
+    Heuristic values are real numbers: the null window of a max node is
+    (alpha, next float after alpha), so that it fails high exactly when
+    the value of the successor is above alpha. The value returned by the
+    failed test bounds the window of the new search.
+    """
+
+    def _min_value(self, state: TwoPlayerGameState, depth: int, alpha: float, beta: float) -> float:
+        """Min step of principal variation search."""
+
+        self._visit_node()
+        value = self._endgame_value(state, depth)
+        if value is not None:
+            return value, None
+        tt_move = None
+        if self.transposition_table is not None:
+            alpha_original, beta_original = alpha, beta
+            key, value, alpha, beta, tt_move = self._probe(state, depth, alpha, beta)
+            if value is not None:
+                return value, None
+
+        value = self._probcut(state, depth, alpha, beta, False)
+        if value is not None:
+            return value, None
+
+        minimax_successor = None
+        best_move = None
+        if state.end_of_game or depth == 0:
+            minimax_value = self._leaf_value(state, alpha, beta, False)
+        else:
+            minimax_value = np.inf
+
+            children, move_codes = self._ordered_children(state, depth, None, tt_move)
+            for move_number, child in enumerate(children):
+                if self.verbose > 1:
+                    print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
+
+                successor = self._make_child(state, child)
+                try:
+                    if move_number == 0:
+                        successor_minimax_value, _ = self._max_value(successor, depth - 1, alpha, beta)
+                    else:
+                        # Null window: is the successor below beta?
+                        successor_minimax_value = self._child_value(
+                            successor, depth, np.nextafter(beta, -np.inf), beta, move_number, False,
+                        )
+                        if alpha < successor_minimax_value < beta:
+                            successor_minimax_value, _ = self._max_value(
+                                successor, depth - 1, alpha, successor_minimax_value,
+                            )
+                    if successor_minimax_value < minimax_value:
+                        minimax_value = successor_minimax_value
+                        minimax_successor = successor
+                        best_move = successor.move_code
+                finally:
+                    self._unmake_child(state)
+                beta = min(beta, minimax_value)
+                if beta <= alpha:
+                    self._record_cutoff(state, depth, move_codes, move_number)
+                    break
+
+        if self.verbose > 1:
+            print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
+
+        if self.transposition_table is not None:
+            self._store(key, depth, minimax_value, alpha_original, beta_original, best_move)
+
+        return minimax_value, minimax_successor
+
+    def _max_value(
+        self,
+        state: TwoPlayerGameState,
+        depth: int,
+        alpha: float,
+        beta: float,
+        successors: Optional[List[TwoPlayerGameState]] = None,
+    ) -> float:
+        """Max step of principal variation search."""
+
+        self._visit_node()
+        value = self._endgame_value(state, depth)
+        if value is not None:
+            return value, None
+        tt_move = None
+        if self.transposition_table is not None:
+            alpha_original, beta_original = alpha, beta
+            key, value, alpha, beta, tt_move = self._probe(state, depth, alpha, beta)
+            if value is not None:
+                return value, None
+
+        value = self._probcut(state, depth, alpha, beta, True)
+        if value is not None:
+            return value, None
+
+        minimax_successor = None
+        best_move = None
+        if state.end_of_game or depth == 0:
+            minimax_value = self._leaf_value(state, alpha, beta, True)
+        else:
+            minimax_value = -np.inf
+            children, move_codes = self._ordered_children(state, depth, successors, tt_move)
+            for move_number, child in enumerate(children):
+                if self.verbose > 1:
+                    print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
+
+                successor = self._make_child(state, child)
+                try:
+                    if move_number == 0:
+                        successor_minimax_value, _ = self._min_value(successor, depth - 1, alpha, beta)
+                    else:
+                        # Null window: is the successor above alpha?
+                        successor_minimax_value = self._child_value(
+                            successor, depth, alpha, np.nextafter(alpha, np.inf), move_number, True,
+                        )
+                        if alpha < successor_minimax_value < beta:
+                            successor_minimax_value, _ = self._min_value(
+                                successor, depth - 1, successor_minimax_value, beta,
+                            )
+                    if (successor_minimax_value > minimax_value):
+                        minimax_value = successor_minimax_value
+                        minimax_successor = successor
+                        best_move = successor.move_code
+                finally:
+                    self._unmake_child(state)
+
+                alpha = max(alpha, minimax_value)
+                if beta <= alpha:
+                    self._record_cutoff(state, depth, move_codes, move_number)
+                    break
+
+        if self.verbose > 1:
+            print(f"{state.board}: {minimax_value}, [{alpha}, {beta}]")
+
+        if self.transposition_table is not None:
+            self._store(key, depth, minimax_value, alpha_original, beta_original, best_move)
+
+        return minimax_value, minimax_successor
+
+
+def _scratch_copy(state: TwoPlayerGameState) -> TwoPlayerGameState:
+    """Copy of a state with its own board, to play moves in place on it."""
+    scratch_state = copy.copy(state)
+    scratch_state.board = copy.deepcopy(state.board)
+    scratch_state._valid_moves = dict(state._valid_moves)
+    return scratch_state
+
+
+def _result_player1(scores: Any) -> float:
+    """Result of a finished game for player 1: 1 win, 0.5 draw, 0 loss."""
+    if scores[0] > scores[1]:
+        return 1.0
+    return 0.5 if scores[0] == scores[1] else 0.0
+
+
+class _MCTSNode(object):
+    """Node of the tree of Monte Carlo tree search."""
+
+    __slots__ = (
+        'move', 'move_code', 'parent', 'children', 'untried_moves',
+        'player_label', 'key', 'visits', 'wins',
+    )
+
+    def __init__(
+        self,
+        move: Any,
+        move_code: Any,
+        parent: Optional[_MCTSNode],
+        player_label: Any,
+        key: Any,
+    ) -> None:
+        self.move = move
+        self.move_code = move_code
+        self.parent = parent
+        self.children: List[_MCTSNode] = []
+        # Moves without a child yet, None until the node is first expanded.
+        self.untried_moves: Optional[list] = None
+        # Player who made the move to this node, whose wins are counted.
+        self.player_label = player_label
+        self.key = key
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTSStrategy(Strategy):
+    """Monte Carlo tree search with the UCT selection rule.
+
+    Each iteration descends the tree choosing the child with the best
+    upper confidence bound, adds a child for an untried move, plays the
+    game to the end with random moves (TwoPlayerGame.random_playout) and
+    counts the result in the nodes of the path. The move played is the
+    most visited child of the root. No heuristic is needed.
+
+    Iterations run until max_iterations are done or max_seconds_per_move
+    have passed (whichever comes first, and before the deadline). The
+    tree is walked by playing and taking back moves on a single copy of
+    the state. With keep_tree, the subtree of the position reached after
+    the opponent's reply is reused in the next move.
+    """
+
+    # Seconds kept in reserve to return the move before the deadline.
+    deadline_margin = 0.05
+
+    def __init__(
+        self,
+        max_iterations: Optional[int] = 1000,
+        max_seconds_per_move: Optional[float] = None,
+        exploration: float = math.sqrt(2),
+        keep_tree: bool = True,
+        seed: Optional[int] = None,
+        verbose: int = 0,
+    ) -> None:
+        if max_iterations is None and max_seconds_per_move is None:
+            raise ValueError('Give a number of iterations, a time budget or both')
+        super().__init__(verbose)
+        self.max_iterations = max_iterations
+        self.max_seconds_per_move = max_seconds_per_move
+        self.exploration = exploration
+        self.keep_tree = keep_tree
+        self._rng = random.Random(seed)
+        self._root: Optional[_MCTSNode] = None
+        # Statistics of the last move.
+        self.iterations = 0
+        self.playouts = 0
+        self.seconds = 0.0
+        self.reused_visits = 0
+
+    def next_move(
+        self,
+        state: TwoPlayerGameState,
+        gui: bool = False,
+        deadline: Optional[Deadline] = None,
+    ) -> TwoPlayerGameState:
+        """Compute the next state in the game."""
+        start = time.perf_counter()
+        seconds = self.max_seconds_per_move
+        if deadline is not None:
+            seconds = min(
+                np.inf if seconds is None else seconds,
+                deadline.remaining() - self.deadline_margin,
+            )
+        budget = Deadline(seconds, parent=deadline)
+
+        root = self._find_root(state)
+        self.reused_visits = root.visits
+        self.iterations = 0
+        self.playouts = 0
+        visits = self._search(state, root, budget)
+        self.seconds = time.perf_counter() - start
+
+        best_move_code = max(visits, key=visits.get)
+        if self.verbose > 0:
+            print('MCTS: {} playouts ({:.0f} per second), {} reused, {} visits to {}'.format(
+                self.playouts,
+                self.playouts_per_second(),
+                self.reused_visits,
+                visits[best_move_code],
+                best_move_code,
+            ))
+        self._root = None
+        if self.keep_tree:
+            for child in root.children:
+                if child.move_code == best_move_code:
+                    self._root = child
+
+        for successor in self.generate_successors(state):
+            if successor.move_code == best_move_code:
+                return successor
+        raise ValueError('Move {} not found'.format(best_move_code))
+
+    def playouts_per_second(self) -> float:
+        """Playouts per second in the last move."""
+        return self.playouts / self.seconds if self.seconds > 0 else np.inf
+
+    def _search(
+        self,
+        state: TwoPlayerGameState,
+        root: _MCTSNode,
+        budget: Deadline,
+    ) -> dict:
+        """Grow the tree of the state within the budget.
+
+        Returns the visits of each move (by move code) of the root.
+        """
+        scratch_state = _scratch_copy(state)
+        while (
+            self.max_iterations is None or self.iterations < self.max_iterations
+        ) and not (self.iterations > 0 and budget.expired()):
+            self._iterate(root, scratch_state)
+            self.iterations += 1
+        return {child.move_code: child.visits for child in root.children}
+
+    def _find_root(self, state: TwoPlayerGameState) -> _MCTSNode:
+        """Node of the state in the tree kept from the last move, or a new one."""
+        key = state.zobrist_key
+        if self._root is not None:
+            # The root is the position after our last move; the state
+            # should be one of its children, after the opponent's reply.
+            for node in [self._root] + self._root.children:
+                if node.key == key:
+                    node.parent = None
+                    return node
+        return _MCTSNode(
+            None,
+            state.move_code,
+            None,
+            state.game.opponent(state.next_player).label,
+            key,
+        )
+
+    def _iterate(self, root: _MCTSNode, state: TwoPlayerGameState) -> None:
+        """Selection, expansion, playout and backpropagation."""
+        game = state.game
+        undo_stack = []
+        path = []
+        node = root
+        try:
+            # Selection
+            while node.untried_moves == [] and node.children:
+                node = self._select(node)
+                undo_stack.append(game.make_move(state, node.move))
+                path.append(node.move)
+
+            # Expansion
+            if node.untried_moves is None:
+                node.untried_moves = [] if state.end_of_game else list(game.moves(state))
+            if node.untried_moves:
+                moves = node.untried_moves
+                move = moves.pop(self._rng.randrange(len(moves)))
+                player_label = state.next_player.label
+                undo_stack.append(game.make_move(state, move))
+                path.append(move)
+                child = _MCTSNode(
+                    move, state.move_code, node, player_label, state.zobrist_key,
+                )
+                node.children.append(child)
+                node = child
+
+            # Playout
+            if state.end_of_game:
+                n_playouts, wins_player1 = 1, _result_player1(state.scores)
+            else:
+                n_playouts, wins_player1 = self._simulate(state, path)
+        finally:
+            while undo_stack:
+                game.unmake_move(state, undo_stack.pop())
+
+        # Backpropagation
+        self.playouts += n_playouts
+        player1_label = game.player1.label
+        while node is not None:
+            node.visits += n_playouts
+            if node.player_label == player1_label:
+                node.wins += wins_player1
+            else:
+                node.wins += n_playouts - wins_player1
+            node = node.parent
+
+    def _simulate(self, state: TwoPlayerGameState, path: list) -> Tuple[int, float]:
+        """Playouts from a leaf, reached from the root by the moves in path.
+
+        Returns the number of playouts and the wins of player 1 in them
+        (a draw counts as half a win).
+        """
+        return 1, _result_player1(state.game.random_playout(state, self._rng))
+
+    def _select(self, node: _MCTSNode) -> _MCTSNode:
+        """Child with the largest upper confidence bound (UCT)."""
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best_child, best_bound = None, -np.inf
+        for child in node.children:
+            bound = (
+                child.wins / child.visits
+                + exploration * math.sqrt(log_visits / child.visits)
+            )
+            if bound > best_bound:
+                best_child, best_bound = child, bound
+        return best_child
+
+
+def _mcts_root_worker(seed: int) -> Tuple[dict, int, int]:
+    """Grow an independent tree in a worker (root parallelization).
+
+    Returns the visits of each move of the root, the iterations and
+    the playouts.
+    """
+    strategy, state, budget = parallel.shared()
+    strategy._rng = random.Random(seed)
+    # A new tree: the one kept by the player is grown by the player.
+    strategy._root = None
+    strategy.iterations = strategy.playouts = 0
+    visits = MCTSStrategy._search(strategy, state, strategy._find_root(state), budget)
+    return visits, strategy.iterations, strategy.playouts
+
+
+def _mcts_leaf_worker(path: list, n_playouts: int, seed: int) -> Tuple[int, float]:
+    """Playouts from the leaf reached by path (leaf parallelization)."""
+    strategy, state, _ = parallel.shared()
+    rng = random.Random(seed)
+    game = state.game
+    undo_stack = [game.make_move(state, move) for move in path]
+    try:
+        wins_player1 = sum(
+            _result_player1(game.random_playout(state, rng))
+            for _ in range(n_playouts)
+        )
+    finally:
+        while undo_stack:
+            game.unmake_move(state, undo_stack.pop())
+    return n_playouts, wins_player1
+
+
+class ParallelMCTSStrategy(MCTSStrategy):
+    """Monte Carlo tree search on several processes.
+
+    workers is the number of processes, including the one of the player.
+    With parallelism='root', each process grows its own tree for the
+    whole budget, and the visits of the moves of the root are added up
+    to choose the move. With parallelism='leaf', there is a single tree,
+    and each new leaf is evaluated by leaf_batch playouts in each process.
+
+    Root parallelization needs no communication until the end, so it
+    scales best; only the tree of the player is kept between moves.
+    Worker processes are forked for each move (see parallel.py): on
+    platforms without fork, the search is serial.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        parallelism: str = 'root',
+        leaf_batch: int = 8,
+        max_iterations: Optional[int] = 1000,
+        max_seconds_per_move: Optional[float] = None,
+        exploration: float = math.sqrt(2),
+        keep_tree: bool = True,
+        seed: Optional[int] = None,
+        verbose: int = 0,
+    ) -> None:
+        if parallelism not in ('root', 'leaf'):
+            raise ValueError('Unknown parallelism {}, use root or leaf'.format(parallelism))
+        super().__init__(
+            max_iterations,
+            max_seconds_per_move,
+            exploration,
+            keep_tree,
+            seed,
+            verbose,
+        )
+        self.workers = os.cpu_count() if workers is None else workers
+        self.parallelism = parallelism
+        self.leaf_batch = leaf_batch
+        self._executor = None
+
+    def _search(
+        self,
+        state: TwoPlayerGameState,
+        root: _MCTSNode,
+        budget: Deadline,
+    ) -> dict:
+        """Grow the trees of the state within the budget."""
+        shared_object = (self, _scratch_copy(state), budget)
+        with parallel.forked_pool(self.workers - 1, shared_object) as executor:
+            if self.parallelism == 'leaf':
+                self._executor = executor
+                try:
+                    return super()._search(state, root, budget)
+                finally:
+                    self._executor = None
+
+            futures = [] if executor is None else [
+                executor.submit(_mcts_root_worker, self._rng.getrandbits(64))
+                for _ in range(self.workers - 1)
+            ]
+            visits = super()._search(state, root, budget)
+            for future in futures:
+                worker_visits, iterations, playouts = future.result()
+                for move_code, move_visits in worker_visits.items():
+                    visits[move_code] = visits.get(move_code, 0) + move_visits
+                self.iterations += iterations
+                self.playouts += playouts
+            return visits
+
+    def _simulate(self, state: TwoPlayerGameState, path: list) -> Tuple[int, float]:
+        """Batches of playouts from a leaf in every process."""
+        if self.parallelism != 'leaf':
+            return super()._simulate(state, path)
+        futures = [] if self._executor is None else [
+            self._executor.submit(
+                _mcts_leaf_worker, path, self.leaf_batch, self._rng.getrandbits(64),
+            )
+            for _ in range(self.workers - 1)
+        ]
+        n_playouts, wins_player1 = 0, 0.0
+        for _ in range(self.leaf_batch):
+            playouts, wins = super()._simulate(state, path)
+            n_playouts += playouts
+            wins_player1 += wins
+        for future in futures:
+            playouts, wins = future.result()
+            n_playouts += playouts
+            wins_player1 += wins
+        return n_playouts, wins_player1
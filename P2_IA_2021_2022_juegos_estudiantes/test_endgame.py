@@ -0,0 +1,95 @@
+"""Tests of the exact endgame solver against a full search of the game tree."""
+
+from __future__ import annotations  # For Python 3.7
+
+import time
+
+import pytest
+
+from endgame import EndgameSolver
+from game import Deadline, DeadlineExceeded, Player, TwoPlayerGameState
+from heuristic import heuristic_2
+from reversi import ArrayReversi, BitboardReversi, Reversi
+from search_benchmark import random_positions
+from strategy import MinimaxAlphaBetaStrategy, RandomStrategy
+
+GAMES = [Reversi, BitboardReversi, ArrayReversi]
+
+
+def positions(game_class: type, size: int, empties: int, n_positions: int = 4) -> list:
+    """Random positions with about the given number of empty squares."""
+    player1 = Player(name='Player 1', strategy=RandomStrategy())
+    player2 = Player(name='Player 2', strategy=RandomStrategy())
+    game = game_class(player1, player2, size, size)
+    initial_state = TwoPlayerGameState(game=game, initial_player=player1)
+    plies = size * size - 4 - empties
+    return random_positions(
+        initial_state, n_positions, min_plies=plies, max_plies=plies, seed=size + empties,
+    )
+
+
+def final_difference(state: TwoPlayerGameState) -> float:
+    """Discs of player 1 minus discs of player 2 with perfect play (full search)."""
+    if state.end_of_game:
+        return state.scores[0] - state.scores[1]
+    differences = [
+        final_difference(successor)
+        for successor in state.game.generate_successors(state)
+    ]
+    if state.next_player.label == state.player1.label:
+        return max(differences)
+    return min(differences)
+
+
+def sign(value: float) -> int:
+    return int(value > 0) - int(value < 0)
+
+
+@pytest.mark.parametrize('game_class', GAMES)
+def test_solver_equals_full_search(game_class):
+    solver = EndgameSolver(max_empties=8)
+    for state in positions(game_class, 6, 7):
+        assert solver.applies(state)
+        difference = final_difference(state)
+        if not state.is_player_max(state.player1):
+            difference = -difference
+        value = solver.value(state)
+        assert sign(value) == sign(difference)
+        assert value - sign(value) * solver.win_value == difference
+
+
+@pytest.mark.parametrize('game_class', GAMES)
+def test_win_loss_draw_mode_gives_the_winner(game_class):
+    solver = EndgameSolver(max_empties=8, mode='wld')
+    for state in positions(game_class, 6, 7):
+        difference = final_difference(state)
+        if not state.is_player_max(state.player1):
+            difference = -difference
+        assert solver.value(state) == sign(difference) * solver.win_value
+
+
+def test_strategy_with_solver_plays_a_best_move():
+    for state in positions(Reversi, 6, 6):
+        best = final_difference(state)
+        strategy = MinimaxAlphaBetaStrategy(
+            heuristic_2, 2, endgame_solver=EndgameSolver(max_empties=8),
+        )
+        state.player_max = state.next_player
+        successor = strategy.next_move(state)
+        assert final_difference(successor) == best
+
+
+def test_solver_does_not_apply_with_many_empty_squares():
+    solver = EndgameSolver(max_empties=8)
+    for state in positions(Reversi, 6, 14):
+        assert not solver.applies(state)
+
+
+def test_solver_stops_at_the_deadline():
+    state = positions(BitboardReversi, 8, 20, 1)[0]
+    solver = EndgameSolver(max_empties=20)
+    seconds = 0.2
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        solver.value(state, Deadline(seconds))
+    assert time.perf_counter() - start < seconds + 0.1
@@ -0,0 +1,98 @@
+"""Tests of moves played in place (make_move and unmake_move)."""
+
+from __future__ import annotations  # For Python 3.7
+
+import random
+
+import numpy as np
+import pytest
+
+from game import Player, TwoPlayerGameState
+from reversi import ArrayReversi, BitboardReversi, Reversi
+from simple_game_tree import SimpleGame
+from strategy import RandomStrategy
+from tictactoe import TicTacToe
+
+
+def initial_state(game_name: str) -> TwoPlayerGameState:
+    player1 = Player(name='Player 1', strategy=RandomStrategy())
+    player2 = Player(name='Player 2', strategy=RandomStrategy())
+    if game_name == 'tictactoe':
+        game = TicTacToe(player1, player2, 3)
+        board = np.zeros((3, 3))
+    elif game_name == 'simple':
+        game = SimpleGame(player1, player2)
+        board = 'A'
+    else:
+        game_class = {
+            'reversi': Reversi,
+            'bitboard': BitboardReversi,
+            'array': ArrayReversi,
+        }[game_name]
+        game = game_class(player1, player2, 6, 6)
+        board = None
+    return TwoPlayerGameState(
+        game=game, initial_player=player1, board=board,
+    ).setup_match()
+
+
+def board_value(board):
+    if isinstance(board, np.ndarray):
+        return board.tolist()
+    if hasattr(board, 'items'):
+        return dict(board)
+    return board
+
+
+def description(state: TwoPlayerGameState) -> tuple:
+    return (
+        board_value(state.board),
+        state.next_player.label,
+        state.end_of_game,
+        None if state.scores is None else list(state.scores),
+        state.zobrist_key,
+        # Only the pieces of Reversi are discs of the players.
+        state.disc_counts if isinstance(state.game, Reversi) else None,
+        list(state.game.moves(state)),
+    )
+
+
+@pytest.mark.parametrize(
+    'game_name', ['reversi', 'bitboard', 'array', 'tictactoe', 'simple'],
+)
+@pytest.mark.parametrize('seed', range(3))
+def test_make_and_unmake_every_move(game_name, seed):
+    rng = random.Random(seed)
+    state = initial_state(game_name)
+    game = state.game
+    while not state.end_of_game:
+        before = description(state)
+        for move in game.moves(state):
+            successor = game.successor(state, move)
+            undo_info = game.make_move(state, move)
+            assert description(state) == description(successor)
+            assert state.move_code == successor.move_code
+            # The incremental key and counts equal those computed from scratch.
+            assert state.zobrist_key == game.zobrist_hash(state)
+            if isinstance(game, Reversi):
+                assert state.disc_counts == game.disc_counts(state)
+            game.unmake_move(state, undo_info)
+            assert description(state) == before
+        state = game.successor(state, rng.choice(game.moves(state)))
+
+
+@pytest.mark.parametrize(
+    'game_name', ['reversi', 'bitboard', 'array', 'tictactoe', 'simple'],
+)
+def test_unmake_a_whole_game(game_name):
+    rng = random.Random(0)
+    state = initial_state(game_name)
+    game = state.game
+    descriptions = []
+    undo_infos = []
+    while not state.end_of_game:
+        descriptions.append(description(state))
+        undo_infos.append(game.make_move(state, rng.choice(game.moves(state))))
+    while undo_infos:
+        game.unmake_move(state, undo_infos.pop())
+        assert description(state) == descriptions.pop()
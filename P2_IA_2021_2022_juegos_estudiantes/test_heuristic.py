@@ -0,0 +1,98 @@
+"""Tests of the evaluation of heuristics on read-only views of states."""
+
+from __future__ import annotations  # For Python 3.7
+
+import pytest
+
+from game import Player, TwoPlayerGameState
+from heuristic import Heuristic
+from reversi import ArrayReversi, BitboardReversi, Reversi
+from search_benchmark import random_positions
+from strategy import MinimaxAlphaBetaStrategy, RandomStrategy
+
+GAMES = [Reversi, BitboardReversi, ArrayReversi]
+
+
+def mutating_evaluation(state: TwoPlayerGameState) -> float:
+    """Empties the lists of legal moves of the state it evaluates."""
+    for player in (state.player1, state.player2):
+        moves = state.get_valid_moves(player)
+        while moves:
+            moves.pop()
+    return 0.0
+
+
+def writing_evaluation(state: TwoPlayerGameState) -> float:
+    """Tries to play on a corner of the board it evaluates."""
+    state.board[1, 1] = state.player1.label
+    return 0.0
+
+
+def positions(game_class: type, n_positions: int = 5) -> list:
+    player1 = Player(name='Player 1', strategy=RandomStrategy())
+    player2 = Player(name='Player 2', strategy=RandomStrategy())
+    game = game_class(player1, player2, 8, 8)
+    initial_state = TwoPlayerGameState(game=game, initial_player=player1)
+    return random_positions(initial_state, n_positions, seed=0)
+
+
+def valid_moves(state: TwoPlayerGameState) -> list:
+    return [
+        list(state.get_valid_moves(player))
+        for player in (state.player1, state.player2)
+    ]
+
+
+@pytest.mark.parametrize('game_class', GAMES)
+@pytest.mark.parametrize('check_mutations', [False, True])
+def test_heuristic_cannot_change_legal_moves(game_class, check_mutations):
+    heuristic = Heuristic('mutating', mutating_evaluation, check_mutations)
+    for state in positions(game_class):
+        moves = valid_moves(state)
+        heuristic.evaluate(state)
+        assert valid_moves(state) == moves
+        assert valid_moves(state) == [
+            list(state.game.valid_moves(state, player))
+            for player in (state.player1, state.player2)
+        ]
+
+
+@pytest.mark.parametrize('game_class', GAMES)
+def test_heuristic_cannot_change_board(game_class):
+    heuristic = Heuristic('writing', writing_evaluation)
+    for state in positions(game_class):
+        board = dict(state.board)
+        with pytest.raises((TypeError, AttributeError)):
+            heuristic.evaluate(state)
+        assert dict(state.board) == board
+
+
+@pytest.mark.parametrize('game_class', GAMES)
+def test_search_with_mutating_heuristic_returns_intact_successor(game_class):
+    heuristic = Heuristic('mutating', mutating_evaluation)
+    for state in positions(game_class):
+        strategy = MinimaxAlphaBetaStrategy(heuristic, max_depth_minimax=2)
+        successor = strategy.next_move(state)
+        player = successor.next_player
+        assert list(successor.get_valid_moves()) == list(
+            successor.game.valid_moves(successor, player),
+        )
+
+
+def test_heuristic_can_generate_successors_of_view():
+    def successors_evaluation(state: TwoPlayerGameState) -> float:
+        successors = state.game.generate_successors(state)
+        state.clone()
+        return float(len(successors))
+
+    heuristic = Heuristic('successors', successors_evaluation, check_mutations=True)
+    for state in positions(Reversi):
+        assert heuristic.evaluate(state) == len(state.game.generate_successors(state))
+
+
+def test_dictionary_board_of_view_is_not_copied():
+    state = positions(Reversi, 1)[0]
+    view = state.read_only_view()
+    assert view.board == state.board
+    state.board[1, 1] = state.player1.label
+    assert view.board[1, 1] == state.player1.label
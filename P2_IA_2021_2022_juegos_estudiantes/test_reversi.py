@@ -0,0 +1,75 @@
+"""Tests of the board representations of Reversi.
+
+The dictionary board of Reversi is the reference: BitboardReversi and
+ArrayReversi have to give the same legal moves, boards and scores.
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+import random
+
+import pytest
+
+from game import Player, TwoPlayerGameState
+from reversi import ArrayReversi, BitboardReversi, Reversi
+from strategy import RandomStrategy
+
+BOARD_SIZES = [(4, 4), (6, 6), (8, 8), (6, 8), (5, 7)]
+
+
+def initial_states(height: int, width: int) -> list:
+    """Initial states of Reversi, BitboardReversi and ArrayReversi."""
+    player1 = Player(name='Player 1', strategy=RandomStrategy())
+    player2 = Player(name='Player 2', strategy=RandomStrategy())
+    return [
+        TwoPlayerGameState(
+            game=game_class(player1, player2, height, width),
+            initial_player=player1,
+        ).setup_match()
+        for game_class in (Reversi, BitboardReversi, ArrayReversi)
+    ]
+
+
+def description(state: TwoPlayerGameState) -> tuple:
+    """Everything that the board representations have to agree on."""
+    return (
+        dict(state.board),
+        [list(state.get_valid_moves(player)) for player in (state.player1, state.player2)],
+        state.next_player.label,
+        state.end_of_game,
+        None if state.scores is None else list(state.scores),
+        state.zobrist_key,
+        state.disc_counts,
+    )
+
+
+@pytest.mark.parametrize('height, width', BOARD_SIZES)
+@pytest.mark.parametrize('seed', range(3))
+def test_random_games_are_equal_on_every_board(height, width, seed):
+    rng = random.Random(seed)
+    states = initial_states(height, width)
+    while not states[0].end_of_game:
+        reference = description(states[0])
+        for state in states[1:]:
+            assert description(state) == reference
+        move = rng.choice(states[0].game.moves(states[0]))
+        states = [state.game.successor(state, move) for state in states]
+    for state in states:
+        assert state.end_of_game
+        assert list(state.scores) == list(states[0].scores)
+
+
+@pytest.mark.parametrize('height, width', BOARD_SIZES)
+def test_successors_are_equal_on_every_board(height, width):
+    rng = random.Random(0)
+    states = initial_states(height, width)
+    for _ in range(height * width // 2):
+        if states[0].end_of_game:
+            break
+        successors = [state.game.generate_successors(state) for state in states]
+        for other in successors[1:]:
+            assert [description(successor) for successor in other] == [
+                description(successor) for successor in successors[0]
+            ]
+        index = rng.randrange(len(successors[0]))
+        states = [state_successors[index] for state_successors in successors]
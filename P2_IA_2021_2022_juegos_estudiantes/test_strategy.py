@@ -0,0 +1,74 @@
+"""Tests of the search strategies: all the searches give the minimax value."""
+
+from __future__ import annotations  # For Python 3.7
+
+import pytest
+
+from game import Player, TwoPlayerGameState
+from heuristic import Heuristic
+from move_ordering import MoveOrdering
+from reversi import BitboardReversi, Reversi
+from search_benchmark import compare_strategies, random_positions
+from strategy import (MinimaxAlphaBetaStrategy, MinimaxStrategy, PVSStrategy,
+                      RandomStrategy)
+from transposition import TranspositionTable
+
+
+def scattered_values(state: TwoPlayerGameState) -> float:
+    """Deterministic values with few ties, so that any search error shows."""
+    if state.end_of_game:
+        return 1000.0 * (state.scores[0] - state.scores[1])
+    return (state.zobrist_key % 1009) / 7.0
+
+
+heuristic = Heuristic(name='scattered', evaluation_function=scattered_values)
+
+
+def positions(game_class: type) -> list:
+    player1 = Player(name='Player 1', strategy=RandomStrategy())
+    player2 = Player(name='Player 2', strategy=RandomStrategy())
+    game = game_class(player1, player2, 6, 6)
+    initial_state = TwoPlayerGameState(game=game, initial_player=player1)
+    return random_positions(initial_state, 8, min_plies=4, max_plies=26, seed=5)
+
+
+def strategies(depth: int) -> dict:
+    return {
+        'minimax': MinimaxStrategy(heuristic, depth),
+        'alpha-beta': MinimaxAlphaBetaStrategy(heuristic, depth),
+        'transposition table': MinimaxAlphaBetaStrategy(
+            heuristic, depth, transposition_table=TranspositionTable(),
+        ),
+        'move ordering': MinimaxAlphaBetaStrategy(
+            heuristic, depth,
+            transposition_table=TranspositionTable(),
+            move_ordering=MoveOrdering(),
+        ),
+        'in place': MinimaxAlphaBetaStrategy(heuristic, depth, in_place=True),
+        'lazy': MinimaxAlphaBetaStrategy(heuristic, depth, lazy=True),
+        'pvs': PVSStrategy(heuristic, depth, transposition_table=TranspositionTable()),
+        'aspiration': MinimaxAlphaBetaStrategy(
+            heuristic, depth,
+            transposition_table=TranspositionTable(),
+            max_seconds_per_move=1000,
+            aspiration_window=1.0,
+        ),
+        'mtdf': MinimaxAlphaBetaStrategy(
+            heuristic, depth, transposition_table=TranspositionTable(), mtdf=True,
+        ),
+        'mtdf iterative deepening': MinimaxAlphaBetaStrategy(
+            heuristic, depth,
+            transposition_table=TranspositionTable(),
+            mtdf=True,
+            max_seconds_per_move=1000,
+        ),
+    }
+
+
+@pytest.mark.parametrize('game_class', [Reversi, BitboardReversi])
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+def test_searches_give_the_minimax_value(game_class, depth):
+    results = compare_strategies(positions(game_class), strategies(depth))
+    expected = results['minimax']['values']
+    for name, result in results.items():
+        assert result['values'] == pytest.approx(expected), name
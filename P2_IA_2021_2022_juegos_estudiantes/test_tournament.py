@@ -0,0 +1,64 @@
+"""Tests of tournaments played serially and in worker processes."""
+
+from __future__ import annotations  # For Python 3.7
+
+import numpy as np
+import pytest
+
+import parallel
+from game import Player, TwoPlayerGameState, TwoPlayerMatch
+from heuristic import count_pieces
+from reversi import Reversi
+from tournament import StudentHeuristic, Tournament
+
+
+class RandomHeuristic(StudentHeuristic):
+
+    def get_name(self) -> str:
+        return "random"
+
+    def evaluation_function(self, state: TwoPlayerGameState) -> float:
+        # Depends on the seed of the match.
+        return np.random.rand()
+
+
+class PiecesHeuristic(StudentHeuristic):
+
+    def get_name(self) -> str:
+        return "pieces"
+
+    def evaluation_function(self, state: TwoPlayerGameState) -> float:
+        return count_pieces(state) + 0.1 * np.random.rand()
+
+
+def create_match(player1: Player, player2: Player) -> TwoPlayerMatch:
+    game = Reversi(player1=player1, player2=player2, height=6, width=6)
+    initial_state = TwoPlayerGameState(game=game, initial_player=player1)
+    return TwoPlayerMatch(initial_state, max_seconds_per_move=1000, gui=False)
+
+
+def run_tournament(workers: int, seed: int) -> tuple:
+    tournament = Tournament(max_depth=2, init_match=create_match)
+    strategies = {
+        "student1": [RandomHeuristic, PiecesHeuristic],
+        "student2": [RandomHeuristic],
+    }
+    return tournament.run(
+        student_strategies=strategies,
+        increasing_depth=True,
+        n_pairs=2,
+        allow_selfmatch=False,
+        workers=workers,
+        seed=seed,
+    )
+
+
+@pytest.mark.skipif(not parallel.fork_available(), reason="needs the 'fork' start method")
+@pytest.mark.parametrize('seed', [0, 1])
+def test_parallel_tournament_equals_serial_tournament(seed):
+    serial = run_tournament(workers=1, seed=seed)
+    assert run_tournament(workers=3, seed=seed) == serial
+
+
+def test_seed_makes_tournament_reproducible():
+    assert run_tournament(workers=1, seed=2) == run_tournament(workers=1, seed=2)
@@ -11,7 +11,7 @@ from __future__ import annotations  # For Python 3.7
 import copy
 from tkinter import *
 from tkinter import messagebox
-from typing import Any, Callable, List, Optional, Tuple
+from typing import Any, Callable, Iterable, List, Optional, Tuple
 
 import numpy as np
 
@@ -37,6 +37,10 @@ class TicTacToe(TwoPlayerGame):
         self.dim_board = dim_board
         self.max_score = 1
         self.min_score = -1
+        self._init_zobrist(
+            [(i, j) for i in range(dim_board) for j in range(dim_board)],
+            (self.player1.label, self.player2.label),
+        )
 
     # Private functions
     def _determine_player_label_complete_line(
@@ -79,25 +83,56 @@ class TicTacToe(TwoPlayerGame):
         state: TwoPlayerGameState,
     ) -> List[TwoPlayerGameState]:
         """Generate the list of successors of a game state."""
-        successors = []
+        return [self.successor(state, move) for move in self.moves(state)]
 
-        n_rows, n_columns = np.shape(state.board)
-        for i in range(n_rows):
-            for j in range(n_columns):
-                if (state.board[i, j] == 0):
-                    # Prevent modification of the board
-                    board_successor = copy.deepcopy(state.board)
-                    assert isinstance(state.next_player, Player)
-                    board_successor[i, j] = state.next_player.label
-                    move_code = self._matrix_to_display_coordinates(i, j)
-                    successor = state.generate_successor(
-                        board_successor,
-                        move_code,
-                    )
-
-                    successors.append(successor)
-
-        return successors
+    def successor(
+        self,
+        state: TwoPlayerGameState,
+        move: Any,
+    ) -> TwoPlayerGameState:
+        """Successor of a game state for a move (as in moves)."""
+        assert isinstance(state.next_player, Player)
+        label = state.next_player.label
+        i, j = move
+        # Prevent modification of the board
+        board_successor = copy.deepcopy(state.board)
+        board_successor[i, j] = label
+        return state.generate_successor(
+            board_successor,
+            self._matrix_to_display_coordinates(i, j),
+            state.zobrist_key ^ self._zobrist_side ^ self._zobrist_squares[((i, j), label)],
+        )
+
+    def moves(self, state: TwoPlayerGameState) -> list:
+        """Moves that can be played with make_move."""
+        return [(i, j) for i, j in zip(*np.nonzero(state.board == 0))]
+
+    def move_code(self, state: TwoPlayerGameState, move: Any) -> Any:
+        """Move code of the successor obtained by playing a move."""
+        return self._matrix_to_display_coordinates(*move)
+
+    def _play_in_place(self, state: TwoPlayerGameState, move: Any) -> Any:
+        i, j = move
+        label = state.next_player.label
+        state.board[i, j] = label
+        state.move_code = self.move_code(state, move)
+        state._zobrist_key = (
+            state.zobrist_key
+            ^ self._zobrist_side
+            ^ self._zobrist_squares[((i, j), label)]
+        )
+        state._disc_counts = None
+        return move
+
+    def _undo_in_place(self, state: TwoPlayerGameState, board_undo_info: Any) -> None:
+        state.board[board_undo_info] = 0
+
+    def occupied_squares(self, board: np.ndarray) -> Iterable[Tuple[Any, Any]]:
+        """Pairs (square, label) of the pieces on the board."""
+        return [
+            ((i, j), board[i, j])
+            for i, j in zip(*np.nonzero(board))
+        ]
 
     def _matrix_to_display_coordinates(
         self,
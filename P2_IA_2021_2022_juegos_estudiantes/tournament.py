@@ -6,12 +6,18 @@
 
 from __future__ import annotations  # For Python 3.7
 
+import functools
 import inspect  # for dynamic members of a module
+import multiprocessing
 import os
+import random
 import sys
 from abc import ABC
+from concurrent.futures import ProcessPoolExecutor
 from importlib import find_loader, import_module, util
-from typing import Callable, Tuple
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
 
 from game import Player, TwoPlayerGame, TwoPlayerGameState, TwoPlayerMatch
 from heuristic import Heuristic
@@ -23,6 +29,16 @@ replace MinimaxAlphaBetaStrategy for MinimaxStrategy,
 so that the tournament runs faster.
 """
 
+# Matches of the tournament being run in parallel. Worker processes are
+# forked, so they inherit this list and only receive the match index:
+# the players (and the student classes loaded from files) are never pickled.
+_parallel_matches: List[Callable[[], Optional[tuple]]] = []
+
+
+def _play_parallel_match(index: int) -> Optional[tuple]:
+  return _parallel_matches[index]()
+
+
 class StudentHeuristic(ABC):
     def __init__(self):
         pass
@@ -80,11 +96,17 @@ class Tournament(object):
   n_pairs = games each strategy plays as each color against
   each opponent. So with N strategies, a total of
   N*(N-1)*n_pairs games are played.
+
+  workers = number of processes playing matches in parallel
+  (1 plays them one after the other). With a seed, the random
+  generators are seeded before every match, so that the results
+  are the same whatever the number of workers.
   """
-  def run(self, student_strategies: dict, increasing_depth : bool = True, n_pairs: int = 1, allow_selfmatch : bool = False) -> Tuple[dict, dict, dict]:
+  def run(self, student_strategies: dict, increasing_depth : bool = True, n_pairs: int = 1, allow_selfmatch : bool = False, workers: int = 1, seed: Optional[int] = None) -> Tuple[dict, dict, dict]:
     scores = dict()
     totals = dict()
     name_mapping = dict()
+    matches = []
     for student1 in student_strategies:
       strats1 = student_strategies[student1]
       for student2 in student_strategies:
@@ -124,7 +146,7 @@ class Tournament(object):
                         ),
                     )
 
-                    self.__single_run(player1_first, pl1, name1, pl2, name2, scores, totals)
+                    matches.append((player1_first, pl1, name1, pl2, name2))
                 else:
                     depth=self.__max_depth
                     pl1 = Player(
@@ -144,10 +166,38 @@ class Tournament(object):
                         ),
                     )
 
-                    self.__single_run(player1_first, pl1, name1, pl2, name2, scores, totals)
+                    matches.append((player1_first, pl1, name1, pl2, name2))
+
+    plays = [
+        functools.partial(self.__play, n_match, seed, player1_first, pl1, pl2)
+        for n_match, (player1_first, pl1, _, pl2, _) in enumerate(matches)
+    ]
+    results = self.__play_all(plays, workers)
+    # results are merged in the order of the matches, as in a serial run
+    for (player1_first, pl1, name1, pl2, name2), result in zip(matches, results):
+        self.__single_run(result, name1, name2, scores, totals)
     return scores, totals, name_mapping
 
-  def __single_run(self, player1_first: bool, pl1: Player, name1: str, pl2: Player, name2: str, scores: dict, totals: dict):
+  def __play_all(self, plays: list, workers: int) -> list:
+    global _parallel_matches
+    if workers > 1 and len(plays) > 1:
+      if "fork" not in multiprocessing.get_all_start_methods():
+        print("Parallel tournaments need the 'fork' start method, playing %d matches serially" % (len(plays)), file=sys.stderr)
+      else:
+        _parallel_matches = plays
+        try:
+          context = multiprocessing.get_context("fork")
+          with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            return list(executor.map(_play_parallel_match, range(len(plays))))
+        finally:
+          _parallel_matches = []
+    return [play() for play in plays]
+
+  def __play(self, n_match: int, seed: Optional[int], player1_first: bool, pl1: Player, pl2: Player) -> Optional[tuple]:
+        """Play a match, return the scores of pl1 and pl2 (None if it could not be scored)."""
+        if seed is not None:
+            random.seed(seed + n_match)
+            np.random.seed(seed + n_match)
         players = []
         if player1_first:
             players = [pl1, pl2]
@@ -156,19 +206,25 @@ class Tournament(object):
         game = self.__init_match(players[0], players[1])
         try:
             game_scores = game.play_match()
-            # let's get the scores (do not assume they will always be binary)
-            # we assume a higher score is better
-            if player1_first:
-                score1, score2 = game_scores[0], game_scores[1]
-            else:
-                score1, score2 = game_scores[1], game_scores[0]
+        except Warning:
+            return None
+        # let's get the scores (do not assume they will always be binary)
+        # we assume a higher score is better
+        if player1_first:
+            return game_scores[0], game_scores[1]
+        else:
+            return game_scores[1], game_scores[0]
+
+  def __single_run(self, result: Optional[tuple], name1: str, name2: str, scores: dict, totals: dict):
+        if result is None:
+            wins = loses = 0
+        else:
+            score1, score2 = result
             wins = loses = 0
             if score1 > score2:
                 wins, loses = 1, 0
             else:
                 wins, loses = 0, 1
-        except Warning:
-            wins = loses = 0
         # store the 1-to-1 numbers
         if name1 not in scores:
             scores[name1] = dict()
@@ -0,0 +1,122 @@
+"""Transposition table for game tree search.
+
+    Positions reached through different move orders are searched only
+    once: the result of each search is stored under a key that
+    identifies the position and the player to move.
+"""
+
+from __future__ import annotations  # For Python 3.7
+
+from typing import Any, Hashable, List, NamedTuple, Optional
+
+from game import TwoPlayerGameState
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+REPLACEMENT_POLICIES = ('always', 'depth')
+
+
+class TTEntry(NamedTuple):
+    """Result of the search of a position."""
+    key: Hashable
+    depth: int
+    value: float
+    flag: int
+    move: Any
+    generation: int
+
+
+def position_key(state: TwoPlayerGameState) -> Hashable:
+    """Key of a game state: Zobrist key of the board and player to move."""
+    return state.zobrist_key
+
+
+class TranspositionTable(object):
+    """Fixed size table of search results.
+
+    Each key is mapped to a single slot. When two positions compete for
+    the same slot, the 'always' policy keeps the newest entry and the
+    'depth' policy keeps the entry searched deeper, unless it comes from
+    an earlier search (see new_search).
+    """
+
+    def __init__(self, size: int = 2**16, replacement: str = 'depth') -> None:
+        if size <= 0:
+            raise ValueError('The size of the table has to be positive')
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(
+                'Unknown replacement policy {}, use one of {}'.format(
+                    replacement, REPLACEMENT_POLICIES,
+                ),
+            )
+        self.size = size
+        self.replacement = replacement
+        self.generation = 0
+        self._slots: List[Optional[TTEntry]] = [None] * size
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Reset hit, miss and store counters."""
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def clear(self) -> None:
+        """Remove all the entries."""
+        self._slots = [None] * self.size
+        self.generation = 0
+
+    def new_search(self) -> None:
+        """Mark the entries stored so far as coming from an earlier search."""
+        self.generation += 1
+
+    def lookup(self, key: Hashable) -> Optional[TTEntry]:
+        """Entry stored for a key, None if there is none."""
+        entry = self._slots[hash(key) % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        key: Hashable,
+        depth: int,
+        value: float,
+        flag: int,
+        move: Any = None,
+    ) -> None:
+        """Store the result of a search, subject to the replacement policy."""
+        index = hash(key) % self.size
+        old_entry = self._slots[index]
+        if old_entry is not None:
+            if (
+                self.replacement == 'depth'
+                and old_entry.generation == self.generation
+                and old_entry.depth > depth
+            ):
+                return
+            if old_entry.key != key:
+                self.replacements += 1
+        self._slots[index] = TTEntry(
+            key, depth, value, flag, move, self.generation,
+        )
+        self.stores += 1
+
+    def stats(self) -> dict:
+        """Usage counters."""
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'stores': self.stores,
+            'replacements': self.replacements,
+        }
+
+    def __len__(self) -> int:
+        return sum(entry is not None for entry in self._slots)